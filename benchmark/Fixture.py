@@ -0,0 +1,179 @@
+import random
+import sqlite3
+from os.path import join
+from time import gmtime, strftime, time
+
+import phpserialize
+
+
+# the subset of the replica schema that the managers query; the *_userindex and actor_* views mirror the replicas
+SCHEMA = """CREATE TABLE user (
+  user_id INTEGER PRIMARY KEY,
+  user_name TEXT NOT NULL,
+  user_editcount INTEGER
+);
+CREATE TABLE user_groups (
+  ug_user INTEGER NOT NULL,
+  ug_group TEXT NOT NULL
+);
+CREATE TABLE actor (
+  actor_id INTEGER PRIMARY KEY,
+  actor_user INTEGER,
+  actor_name TEXT NOT NULL
+);
+CREATE TABLE page (
+  page_id INTEGER PRIMARY KEY,
+  page_namespace INTEGER NOT NULL,
+  page_title TEXT NOT NULL,
+  page_content_model TEXT NOT NULL
+);
+CREATE TABLE revision (
+  rev_id INTEGER PRIMARY KEY,
+  rev_page INTEGER NOT NULL,
+  rev_actor INTEGER NOT NULL,
+  rev_timestamp TEXT NOT NULL,
+  rev_parent_id INTEGER NOT NULL
+);
+CREATE TABLE logging (
+  log_id INTEGER PRIMARY KEY,
+  log_type TEXT NOT NULL,
+  log_action TEXT NOT NULL,
+  log_actor INTEGER NOT NULL,
+  log_timestamp TEXT NOT NULL,
+  log_namespace INTEGER NOT NULL,
+  log_title TEXT NOT NULL,
+  log_params TEXT NOT NULL
+);
+CREATE VIEW actor_revision AS SELECT * FROM actor;
+CREATE VIEW actor_logging AS SELECT * FROM actor;
+CREATE VIEW revision_userindex AS SELECT * FROM revision;
+CREATE VIEW logging_userindex AS SELECT * FROM logging;
+CREATE INDEX user_name ON user (user_name);
+CREATE INDEX ug_group ON user_groups (ug_group, ug_user);
+CREATE INDEX actor_name ON actor (actor_name);
+CREATE INDEX rev_actor_timestamp ON revision (rev_actor, rev_timestamp);
+CREATE INDEX rev_timestamp ON revision (rev_timestamp);
+CREATE INDEX log_actor_time ON logging (log_actor, log_timestamp);
+CREATE INDEX log_type_time ON logging (log_type, log_timestamp);
+CREATE INDEX log_page_time ON logging (log_namespace, log_title, log_timestamp);
+CREATE INDEX log_title ON logging (log_title);"""
+
+GROUPS = [
+    'sysop',
+    'bureaucrat',
+    'suppress',
+    'checkuser',
+    'interface-admin',
+    'translationadmin',
+    'propertycreator',
+    'bot',
+    'flood',
+    'ipblock-exempt',
+    'rollbacker',
+    'confirmed'
+]
+
+LOG_TYPES = [ 'block', 'delete', 'protect', 'merge', 'abusefilter', 'pagetranslation', 'patrol', 'newusers' ]
+
+HISTORY = 3*365*86400  # seconds of synthetic history
+RENAMED_SHARE = 0.02
+
+
+class Fixture:  # synthetic wikidatawiki/metawiki replicas with group_size members per tracked group
+    def __init__(self, directory:str, group_size:int, seed:int=0) -> None:
+        self.directory = directory
+        self.group_size = group_size
+        self.random = random.Random(seed)
+        self.now = time()
+
+        self.log_id = 0
+        self.page_id = 0
+        self.rev_id = 0
+
+    def timestamp(self) -> str:  # recent activity is more likely than old one
+        age = HISTORY * self.random.random()**2
+        return strftime('%Y%m%d%H%M%S', gmtime(self.now - age))
+
+    def build(self) -> None:
+        wikidatawiki = sqlite3.connect(join(self.directory, 'wikidatawiki.sqlite3'))
+        metawiki = sqlite3.connect(join(self.directory, 'metawiki.sqlite3'))
+        wikidatawiki.executescript(SCHEMA)
+        metawiki.executescript(SCHEMA)
+
+        usernames = [ f'Benchmark user {index}' for index in range(max(20, self.group_size*3)) ]
+        for user_id, username in enumerate(usernames, start=1):
+            wikidatawiki.execute('INSERT INTO user VALUES (?, ?, ?)', (user_id, username, self.random.randint(0, 100000)))
+            wikidatawiki.execute('INSERT INTO actor VALUES (?, ?, ?)', (user_id, user_id, username))
+            self.add_edits(wikidatawiki, user_id, username)
+            self.add_log_events(wikidatawiki, user_id)
+
+        for group in GROUPS:
+            for user_id in self.random.sample(range(1, len(usernames)+1), min(self.group_size, len(usernames))):
+                username = usernames[user_id-1]
+                wikidatawiki.execute('INSERT INTO user_groups VALUES (?, ?)', (user_id, group))
+
+                if self.random.random() < RENAMED_SHARE:
+                    self.add_rename(metawiki, username)
+                    username = f'Former {username}'
+
+                if self.random.random() < 0.8:
+                    self.add_rights_change(wikidatawiki, username.replace(' ', '_'), group)
+                else:
+                    self.add_rights_change(metawiki, f'{username.replace(" ", "_")}@wikidatawiki', group)
+
+        wikidatawiki.commit()
+        metawiki.commit()
+        wikidatawiki.close()
+        metawiki.close()
+
+    def add_edits(self, connection:sqlite3.Connection, actor_id:int, username:str) -> None:
+        for _ in range(self.random.randint(0, 30)):
+            self.page_id += 1
+            self.rev_id += 1
+
+            namespace, content_model = self.random.choice([
+                (0, 'wikibase-item'),
+                (0, 'wikibase-item'),
+                (120, 'wikibase-property'),
+                (8, 'wikitext'),
+                (8, 'javascript'),
+                (2, 'css'),
+                (4, 'wikitext')
+            ])
+            if namespace == 2:
+                title = f'{username.replace(" ", "_")}/common.css'
+            else:
+                title = f'Benchmark_page_{self.page_id}'
+
+            connection.execute('INSERT INTO page VALUES (?, ?, ?, ?)', (self.page_id, namespace, title, content_model))
+            connection.execute(
+                'INSERT INTO revision VALUES (?, ?, ?, ?, ?)',
+                (self.rev_id, self.page_id, actor_id, self.timestamp(), 0 if self.random.random() < 0.5 else self.rev_id-1)
+            )
+
+    def add_log_events(self, connection:sqlite3.Connection, actor_id:int) -> None:
+        for _ in range(self.random.randint(0, 30)):
+            self.log_id += 1
+            connection.execute(
+                'INSERT INTO logging VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (self.log_id, self.random.choice(LOG_TYPES), 'benchmark', actor_id, self.timestamp(), 0, 'Q1', '')
+            )
+
+    def add_rights_change(self, connection:sqlite3.Connection, log_title:str, group:str) -> None:
+        self.log_id += 1
+        params = phpserialize.dumps({ '4::oldgroups' : [], '5::newgroups' : [ group ] }).decode('utf8')
+        connection.execute(
+            'INSERT INTO logging VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (self.log_id, 'rights', 'rights', 1, self.timestamp(), 2, log_title, params)
+        )
+
+    def add_rename(self, connection:sqlite3.Connection, username:str) -> None:
+        self.log_id += 1
+        params = phpserialize.dumps({
+            '4::olduser' : f'Former_{username.replace(" ", "_")}',
+            '5::newuser' : username.replace(' ', '_')
+        }).decode('utf8')
+        connection.execute(
+            'INSERT INTO logging VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (self.log_id, 'gblrename', 'rename', 1, self.timestamp(), 2, f'CentralAuth/{username.replace(" ", "_")}', params)
+        )
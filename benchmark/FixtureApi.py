@@ -0,0 +1,52 @@
+import sqlite3
+from datetime import datetime
+from os.path import join
+from threading import Lock
+from typing import Any
+
+
+class FixtureApiResponse:
+    status_code:int = 200
+
+    def __init__(self, payload:dict[str, Any]) -> None:
+        self.payload = payload
+        self.headers:dict[str, str] = {}
+
+    def json(self) -> dict[str, Any]:
+        return self.payload
+
+
+class FixtureApiSession:  # answers list=logevents requests from the fixture; used as ApiClient.session_factory
+    fixture_directory:str = '.'
+    requests:int = 0
+    _lock = Lock()
+
+    def __init__(self) -> None:
+        self.headers:dict[str, str] = {}
+        self.sqlite = sqlite3.connect(join(FixtureApiSession.fixture_directory, 'wikidatawiki.sqlite3'), check_same_thread=False)
+
+    def get(self, url:str, params:dict[str, Any], timeout:float=0) -> FixtureApiResponse:
+        with FixtureApiSession._lock:
+            FixtureApiSession.requests += 1
+
+        leend = params.get('leend')
+        earliest_timestamp = datetime.strptime(leend, '%Y-%m-%dT%H:%M:%SZ').strftime('%Y%m%d%H%M%S') if leend else '0'
+
+        row = self.sqlite.execute(
+            'SELECT MAX(log_timestamp) FROM logging JOIN actor ON log_actor=actor_id WHERE actor_name=? AND log_timestamp>=?',
+            (params.get('leuser'), earliest_timestamp)
+        ).fetchone()
+
+        if row is None or row[0] is None:
+            return FixtureApiResponse({ 'query' : { 'logevents' : [] } })
+
+        timestamp = datetime.strptime(row[0], '%Y%m%d%H%M%S').strftime('%Y-%m-%dT%H:%M:%SZ')
+        return FixtureApiResponse({ 'query' : { 'logevents' : [ { 'timestamp' : timestamp } ] } })
+
+    def close(self) -> None:
+        self.sqlite.close()
+
+    @classmethod
+    def reset_statistics(cls) -> None:
+        with cls._lock:
+            cls.requests = 0
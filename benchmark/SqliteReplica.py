@@ -0,0 +1,142 @@
+import sqlite3
+from os.path import join
+from threading import Lock
+from typing import Any, Iterator, Optional
+
+
+# columns that are VARBINARY/BINARY on the replicas and therefore arrive as bytes
+BINARY_COLUMNS = [
+    'actor_name',
+    'user_name',
+    'page_title',
+    'page_content_model',
+    'rev_timestamp',
+    'log_timestamp',
+    'log_title',
+    'log_params'
+]
+
+
+class Error(Exception):
+    pass
+
+
+class InterfaceError(Error):
+    pass
+
+
+class OperationalError(Error):
+    pass
+
+
+class ProgrammingError(Error):
+    pass
+
+
+class SqliteCursor:
+    def __init__(self, connection:'SqliteConnection', dictionary:bool=False) -> None:
+        self.connection = connection
+        self.dictionary = dictionary
+        self._cursor:Optional[sqlite3.Cursor] = None
+        self._columns:list[str] = []
+
+    def execute(self, query:str) -> None:
+        SqliteReplica.count_query(self.connection.database)
+
+        try:
+            self._cursor = self.connection.sqlite.execute(query)
+        except sqlite3.Error as exception:
+            raise ProgrammingError(str(exception)) from exception
+
+        self._columns = [ description[0] for description in (self._cursor.description or []) ]
+
+    def _convert(self, row:tuple) -> Any:
+        values = tuple([
+            value.encode('utf8') if isinstance(value, str) and column in BINARY_COLUMNS else value
+            for column, value in zip(self._columns, row)
+        ])
+        SqliteReplica.count_rows(self.connection.database, 1)
+
+        if self.dictionary:
+            return dict(zip(self._columns, values))
+
+        return values
+
+    def fetchall(self) -> list[Any]:
+        if self._cursor is None:
+            return []
+
+        return [ self._convert(row) for row in self._cursor.fetchall() ]
+
+    def fetchmany(self, size:int=1) -> list[Any]:
+        if self._cursor is None:
+            return []
+
+        return [ self._convert(row) for row in self._cursor.fetchmany(size) ]
+
+    def fetchone(self) -> Any:
+        rows = self.fetchmany(1)
+        if len(rows) == 0:
+            return None
+
+        return rows[0]
+
+    def __iter__(self) -> Iterator[Any]:
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def close(self) -> None:
+        if self._cursor is not None:
+            self._cursor.close()
+        self._cursor = None
+
+
+class SqliteConnection:
+    def __init__(self, database:str, path:str) -> None:
+        self.database = database
+        self.sqlite = sqlite3.connect(path, check_same_thread=False)
+
+    def cursor(self, dictionary:bool=False, **kwargs:Any) -> SqliteCursor:
+        return SqliteCursor(self, dictionary)
+
+    def ping(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.sqlite.close()
+
+
+class SqliteReplica:  # stands in for the mariadb module as Replica.backend
+    Error = Error
+    InterfaceError = InterfaceError
+    OperationalError = OperationalError
+    ProgrammingError = ProgrammingError
+
+    fixture_directory:str = '.'
+    queries:dict[str, int] = {}
+    rows:dict[str, int] = {}
+    _lock = Lock()
+
+    @classmethod
+    def connect(cls, host:str='', database:str='', default_file:str='', **kwargs:Any) -> SqliteConnection:
+        database = database.removesuffix('_p')
+        return SqliteConnection(database, join(cls.fixture_directory, f'{database}.sqlite3'))
+
+    @classmethod
+    def count_query(cls, database:str) -> None:
+        with cls._lock:
+            cls.queries[database] = cls.queries.get(database, 0) + 1
+
+    @classmethod
+    def count_rows(cls, database:str, rows:int) -> None:
+        with cls._lock:
+            cls.rows[database] = cls.rows.get(database, 0) + rows
+
+    @classmethod
+    def reset_statistics(cls) -> None:
+        with cls._lock:
+            cls.queries.clear()
+            cls.rows.clear()
@@ -0,0 +1,3 @@
+from .Fixture import Fixture
+from .FixtureApi import FixtureApiSession
+from .SqliteReplica import SqliteReplica
\ No newline at end of file
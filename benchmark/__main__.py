@@ -0,0 +1,132 @@
+import json
+import tracemalloc
+from argparse import ArgumentParser, Namespace
+from tempfile import TemporaryDirectory
+from time import perf_counter, time
+from typing import Any, Callable, Type
+
+from wdadminmanager import ApiClient, EventTable, FactCache, GroupMembership, ManagerScheduler, Profiler, Replica, WikiScan
+from wdadminmanager.UserManager import User, UserManager
+
+from .Fixture import Fixture
+from .FixtureApi import FixtureApiSession
+from .SqliteReplica import SqliteReplica
+
+
+def parse_args() -> Namespace:
+    parser = ArgumentParser(prog='python -m benchmark', description='Run the managers against synthetic offline replicas')
+    parser.add_argument('--sizes', default='10,100,1000', help='comma-separated group sizes (default: 10,100,1000)')
+    parser.add_argument('--managers', default='', help='comma-separated manager class names (default: all)')
+    parser.add_argument('--logged-activity-backend', default='replica', choices=sorted(User.last_logged_activity_backends.keys()))
+    parser.add_argument('--window-count-backend', default='scan', choices=sorted(User.window_count_backends.keys()))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--user-workers', type=int, default=1, help='members of one group evaluated concurrently')
+    parser.add_argument('--output', default='', help='write the results as JSON to this file')
+    parser.add_argument('--profile', action='store_true', help='print the per call site profile of the scheduled runs')
+
+    return parser.parse_args()
+
+
+def reset() -> None:
+    FactCache.clear()
+    GroupMembership.clear()
+    EventTable.clear()
+    WikiScan.clear()
+    Replica.close_all()
+    ApiClient.close()  # sessions read from the fixture of the current group size
+    SqliteReplica.reset_statistics()
+    FixtureApiSession.reset_statistics()
+
+
+def measure(label:str, group_size:int, function:Callable[[], Any]) -> dict[str, Any]:
+    SqliteReplica.reset_statistics()
+    FixtureApiSession.reset_statistics()
+
+    tracemalloc.start()
+    t_start = perf_counter()
+    function()
+    wall_time = perf_counter() - t_start
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'manager' : label,
+        'group_size' : group_size,
+        'queries' : sum(SqliteReplica.queries.values()),
+        'rows' : sum(SqliteReplica.rows.values()),
+        'api_requests' : FixtureApiSession.requests,
+        'wall_time' : round(wall_time, 4),
+        'peak_memory' : peak_memory
+    }
+
+
+def benchmark_size(group_size:int, manager_classes:list[Type[UserManager]], seed:int) -> list[dict[str, Any]]:
+    results = []
+
+    with TemporaryDirectory() as directory:
+        Fixture(directory, group_size, seed).build()
+        SqliteReplica.fixture_directory = directory
+        FixtureApiSession.fixture_directory = directory
+
+        for manager_class in manager_classes:
+            reset()
+
+            def run() -> None:
+                manager = manager_class()
+                manager.get_report_page(time())
+
+            results.append(measure(manager_class.__name__, group_size, run))
+
+        reset()
+        Profiler.clear()
+        results.append(measure(
+            'all (scheduled)',
+            group_size,
+            lambda: ManagerScheduler(release_user_data=True).run(manager_classes, lambda manager: manager.get_report_page(time()))
+        ))
+        reset()
+
+    return results
+
+
+def print_results(results:list[dict[str, Any]]) -> None:
+    print(f'{"manager":<28} {"size":>6} {"queries":>8} {"rows":>9} {"api":>6} {"wall [s]":>9} {"peak [KiB]":>11}')
+    for result in results:
+        print(
+            f'{result["manager"]:<28} {result["group_size"]:>6} {result["queries"]:>8} {result["rows"]:>9}' \
+            f' {result["api_requests"]:>6} {result["wall_time"]:>9.3f} {result["peak_memory"]//1024:>11}'
+        )
+
+
+def main() -> None:
+    args = parse_args()
+
+    Replica.backend = SqliteReplica
+    ApiClient.session_factory = FixtureApiSession
+    ApiClient.min_request_interval = 0
+    User.last_logged_activity_backend = args.logged_activity_backend
+    User.window_count_backend = args.window_count_backend
+    Profiler.enabled = args.profile
+    UserManager.max_user_workers = args.user_workers
+
+    manager_classes = list(ManagerScheduler.manager_classes)
+    if args.managers != '':
+        wanted = args.managers.split(',')
+        manager_classes = [ manager_class for manager_class in manager_classes if manager_class.__name__ in wanted ]
+
+    results = []
+    for group_size in [ int(size) for size in args.sizes.split(',') ]:
+        results += benchmark_size(group_size, manager_classes, args.seed)
+
+    print_results(results)
+
+    if args.profile:
+        Profiler.print_summary()
+
+    if args.output != '':
+        with open(args.output, mode='w', encoding='utf8') as file_handle:
+            json.dump(results, file_handle, indent=2)
+
+
+if __name__=='__main__':
+    main()
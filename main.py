@@ -1,27 +1,107 @@
+import os
+import re
+from argparse import ArgumentParser, Namespace
+from calendar import timegm
+from hashlib import sha256
+from tempfile import NamedTemporaryFile
+from threading import Lock
 from time import time
+from types import ModuleType
+from typing import TYPE_CHECKING, Any, Optional, Type
 
-import pywikibot as pwb
-
-from wdadminmanager import UserManager, AdminManager, BureaucratManager, OversighterManager, \
-    CheckuserManager, InterfaceAdminManager, TranslationAdminManager, PropertyCreatorManager, \
-    BotManager, FlooderManager, IPBlockExemptUserManager, RollbackerManager, ConfirmedUserManager
+from wdadminmanager import ApiClient, FactCache, ManagerScheduler, Profiler, Publisher, Replica, ReportTemplate, StateStore
+from wdadminmanager.UserManager import User, UserManager
 
+if TYPE_CHECKING:
+    import pywikibot as pwb
 
 
 BASEPAGE = 'User:MisterSynergy/activity'
 EDIT_SUMMARY = 'update user activity tables #msynbot #unapproved'
 SAVE_TO_WIKIPAGE = True
 SAVE_TO_LOGFILE = True
+DRY_RUN = False  # render all reports and write the log files, but never import pywikibot or contact the wiki
+MAX_CONCURRENT_MANAGERS = Replica.max_connections  # more workers would only queue for a replica connection
+USER_WORKERS = 1  # members of one group evaluated concurrently
+WITHHOLD_INCOMPLETE_REPORTS = False  # do not publish a report with members that could not be evaluated; they are listed in it otherwise
+LAST_LOGGED_ACTIVITY_BACKEND = 'replica'  # 'replica' (one aggregate query per group) or 'api' (one request per user)
+WINDOW_COUNT_BACKEND = 'scan'  # 'scan' (property creations and MediaWiki namespace edits read wiki-wide once), 'replica' (counted per user by the database) or 'events' (numpy)
+INCREMENTAL_MODE = True  # set to False for a full recomputation; the state is rewritten in both modes
+STATE_FILE = './logs/state.sqlite3'
+PROFILE = False  # per call site timing of replica queries and API requests, written to ./logs/profile.{json,csv}
+PROFILE_SUMMARY = True  # print the slowest call sites at the end of a profiled run
+SKIP_UNCHANGED_SAVES = True  # do not edit report pages whose content only differs in the update timestamp
+FORCE_REFRESH_DAYS = 7  # save unchanged report pages anyway if their last save is older than this
+EDIT_THROTTLE = 10  # seconds between two page saves
+MAXLAG = 5  # https://www.mediawiki.org/wiki/Manual:Maxlag_parameter
+
+MANAGER_CLASSES = ManagerScheduler.manager_classes
+OUTPUTS = [ 'wiki', 'logfile' ]
+
+TIMESTAMP_PATTERN = re.compile(r'<span id="msynbot-activity-date" data-utc-timestamp="[0-9]*">[^<]*</span>')
+
+UMASK = os.umask(0)  # read once at startup, before any thread might create files
+os.umask(UMASK)
+
+SITE:Optional['pwb.Site'] = None  # logged in on the first save
+SITE_LOCK = Lock()
+
+
+def saves_to_wikipage() -> bool:
+    return SAVE_TO_WIKIPAGE is True and DRY_RUN is not True
+
+
+def import_pywikibot() -> ModuleType:  # deferred, since importing pywikibot alone takes a noticeable share of a run
+    import pywikibot
+
+    pywikibot.config.put_throttle = EDIT_THROTTLE  # pywikibot waits between saves and backs off while the replication lag exceeds maxlag
+    pywikibot.config.maxlag = MAXLAG
+
+    return pywikibot
+
+
+def get_site() -> 'pwb.Site':
+    global SITE
+
+    with SITE_LOCK:
+        if SITE is None:
+            site = import_pywikibot().Site('wikidata', 'wikidata')
+            site.login()
+            SITE = site
 
-SITE = pwb.Site('wikidata', 'wikidata')
-SITE.login()
+    return SITE
+
+
+def content_hash(body:str) -> str:
+    return sha256(TIMESTAMP_PATTERN.sub('', body).encode('utf8')).hexdigest()
+
+
+def is_unchanged(page:'pwb.Page', body_hash:str) -> bool:
+    published = StateStore.get_published(page.title())
+
+    if published is None:  # nothing cached locally: compare with the current revision instead
+        if not page.exists() or content_hash(page.text) != body_hash:
+            return False
+
+        published = (body_hash, timegm(page.latest_revision.timestamp.utctimetuple()))
+        StateStore.set_published(page.title(), *published)
+
+    published_hash, published_timestamp = published
+
+    return published_hash == body_hash and time() - published_timestamp < FORCE_REFRESH_DAYS*86400
 
 
 def save_to_wikipage(page_title:str, edit_summary:str, body:str) -> None:
-    if SAVE_TO_WIKIPAGE is not True:
+    if not saves_to_wikipage():
+        return
+
+    page = import_pywikibot().Page(get_site(), page_title)
+    body_hash = content_hash(body)
+
+    if SKIP_UNCHANGED_SAVES is True and is_unchanged(page, body_hash):
+        print(f'{page_title}: unchanged, not saved')
         return
 
-    page = pwb.Page(SITE, page_title)
     page.text = body
     page.save(
         summary=edit_summary,
@@ -29,6 +109,7 @@ def save_to_wikipage(page_title:str, edit_summary:str, body:str) -> None:
         minor=True,
         quiet=True
     )
+    StateStore.set_published(page_title, body_hash, int(time()))
 
 
 def save_to_logfile(page_title:str, body:str) -> None:
@@ -36,58 +117,146 @@ def save_to_logfile(page_title:str, body:str) -> None:
         return
 
     filename = f'{page_title}.txt'.replace('/', '_').replace(' ', '_').replace(':', '_')
-    with open(f'./logs/{filename}', mode='w', encoding='utf8') as file_handle:
-        file_handle.write(body)
-        print(filename)
+    with NamedTemporaryFile(mode='w', encoding='utf8', dir='./logs', prefix=f'.{filename}.', delete=False) as file_handle:
+        temporary_filename = file_handle.name
+        try:
+            file_handle.write(body)
+        except BaseException:
+            file_handle.close()
+            os.unlink(temporary_filename)
+            raise
+
+    os.chmod(temporary_filename, 0o666 & ~UMASK)  # as open(..., 'w') would create it; temporary files are owner-only
+    os.replace(temporary_filename, f'./logs/{filename}')  # readers never see a partially written file
+    print(filename)
+
+
+def publish_to_wikipage(page_title:str, body:str) -> None:
+    save_to_wikipage(page_title, EDIT_SUMMARY, body)
 
 
-def save_report(page_title:str, edit_summary:str, body:str) -> None:
-    if SAVE_TO_WIKIPAGE is True:
-        save_to_wikipage(page_title, EDIT_SUMMARY, body)
+def make_publisher() -> Publisher:
+    transient_errors:tuple[Any, ...] = ( ConnectionError, TimeoutError )  # not e.g. a missing ./logs directory
+    if saves_to_wikipage():
+        pwb = import_pywikibot()
+        transient_errors += ( pwb.exceptions.ServerError, pwb.exceptions.TimeoutError, pwb.exceptions.MaxlagTimeoutError )
 
+    publisher = Publisher(transient_errors=transient_errors)
+
+    if saves_to_wikipage():
+        publisher.add_sink(publish_to_wikipage)
     if SAVE_TO_LOGFILE is True:
-        save_to_logfile(page_title, body)
+        publisher.add_sink(save_to_logfile)
+
+    return publisher
+
+
+def parse_args(argv:Optional[list[str]]=None) -> Namespace:
+    groups = [ manager_class.user_class.level for manager_class in MANAGER_CLASSES ]
+    default_outputs = [ output for output, enabled in zip(OUTPUTS, [ SAVE_TO_WIKIPAGE, SAVE_TO_LOGFILE ]) if enabled is True ]
+
+    parser = ArgumentParser(description='Update the user activity reports of Wikidata user groups')
+    parser.add_argument('--groups', default='', help=f'comma-separated user groups (default: all of {",".join(groups)})')
+    parser.add_argument('--outputs', default=','.join(default_outputs), help=f'comma-separated report outputs out of {",".join(OUTPUTS)}; may be empty')
+    parser.add_argument('--dry-run', action='store_true', default=DRY_RUN, help='never import pywikibot or contact the wiki')
+    parser.add_argument('--max-concurrent-managers', type=int, default=MAX_CONCURRENT_MANAGERS)
+    parser.add_argument('--user-workers', type=int, default=USER_WORKERS, help='members of one group evaluated concurrently')
+    parser.add_argument('--withhold-incomplete-reports', action='store_true', default=WITHHOLD_INCOMPLETE_REPORTS, help='do not publish reports with members that could not be evaluated')
+    parser.add_argument('--state-file', default=STATE_FILE, help='location of the state kept between runs')
+    parser.add_argument('--logged-activity-backend', default=LAST_LOGGED_ACTIVITY_BACKEND, choices=sorted(User.last_logged_activity_backends.keys()))
+    parser.add_argument('--window-count-backend', default=WINDOW_COUNT_BACKEND, choices=sorted(User.window_count_backends.keys()))
+    parser.add_argument('--profile', action='store_true', default=PROFILE)
+
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--incremental', dest='incremental', action='store_true', default=INCREMENTAL_MODE, help='only read activity since the previous run')
+    mode.add_argument('--full', dest='incremental', action='store_false', help='recompute everything')
+
+    args = parser.parse_args(argv)
+
+    unknown_groups = [ group for group in args.groups.split(',') if group != '' and group not in groups ]
+    if len(unknown_groups) > 0:
+        parser.error(f'unknown group(s): {", ".join(unknown_groups)}')
+
+    unknown_outputs = [ output for output in args.outputs.split(',') if output != '' and output not in OUTPUTS ]
+    if len(unknown_outputs) > 0:
+        parser.error(f'unknown output(s): {", ".join(unknown_outputs)}')
+
+    return args
+
+
+def select_manager_classes(groups:str) -> list[Type[UserManager]]:
+    if groups == '':
+        return MANAGER_CLASSES
+
+    wanted = groups.split(',')
+    selected = [ manager_class for manager_class in MANAGER_CLASSES if manager_class.user_class.level in wanted ]
+
+    return selected
 
 
-def main() -> None:
+def configure(args:Namespace) -> None:  # command line options override the constants above
+    global SAVE_TO_WIKIPAGE, SAVE_TO_LOGFILE, DRY_RUN, MAX_CONCURRENT_MANAGERS, USER_WORKERS, WITHHOLD_INCOMPLETE_REPORTS, STATE_FILE, INCREMENTAL_MODE, LAST_LOGGED_ACTIVITY_BACKEND, WINDOW_COUNT_BACKEND, PROFILE
+
+    outputs = args.outputs.split(',')
+    SAVE_TO_WIKIPAGE = 'wiki' in outputs
+    SAVE_TO_LOGFILE = 'logfile' in outputs
+    DRY_RUN = args.dry_run
+    MAX_CONCURRENT_MANAGERS = args.max_concurrent_managers
+    USER_WORKERS = args.user_workers
+    WITHHOLD_INCOMPLETE_REPORTS = args.withhold_incomplete_reports
+    STATE_FILE = args.state_file
+    INCREMENTAL_MODE = args.incremental
+    LAST_LOGGED_ACTIVITY_BACKEND = args.logged_activity_backend
+    WINDOW_COUNT_BACKEND = args.window_count_backend
+    PROFILE = args.profile
+
+
+def main(argv:Optional[list[str]]=None) -> None:
+    args = parse_args(argv)
+    configure(args)
+
+    try:
+        StateStore.open(STATE_FILE, incremental=INCREMENTAL_MODE)
+        run(select_manager_classes(args.groups))
+    finally:
+        StateStore.close()
+        Replica.close_all()
+        ApiClient.close()
+
+
+def run(manager_classes:list[Type[UserManager]]=MANAGER_CLASSES) -> None:
     t_start = time()
 
-    admin_manager = AdminManager()
-    bureaucrat_manager = BureaucratManager(admin_manager)
-    oversighter_manager = OversighterManager(admin_manager)
-    checkuser_manager = CheckuserManager()#
-
-    interfaceadmin_manager = InterfaceAdminManager()
-    translationadmin_manager = TranslationAdminManager()
-    propertycreator_manager = PropertyCreatorManager()
-
-    bot_manager = BotManager()
-    flooder_manager = FlooderManager()
-
-    ipblockexemptuser_manager = IPBlockExemptUserManager()
-    rollbacker_manager = RollbackerManager()
-    confirmeduser_manager = ConfirmedUserManager()
-
-    managers = [
-        admin_manager,
-        bureaucrat_manager,
-        oversighter_manager,
-        checkuser_manager,
-        interfaceadmin_manager,
-        translationadmin_manager,
-        propertycreator_manager,
-        bot_manager,
-        flooder_manager,
-        ipblockexemptuser_manager,
-        rollbacker_manager,
-        confirmeduser_manager
-    ]
-
-    for manager in managers:
-        body = manager.get_report_page(t_start)
-        page_title = f'{BASEPAGE}/{manager.report_subpage}'
-
-        save_report(page_title, EDIT_SUMMARY, body)
+    User.last_logged_activity_backend = LAST_LOGGED_ACTIVITY_BACKEND
+    User.window_count_backend = WINDOW_COUNT_BACKEND
+    UserManager.max_user_workers = USER_WORKERS
+    Profiler.enabled = PROFILE
+
+    ReportTemplate.preload([ manager_class.report_template for manager_class in manager_classes ])
+
+    withheld_reports:list[str] = []
+
+    with make_publisher() as publisher:  # saves overlap with the computation of the remaining managers
+        def submit_report(manager:UserManager) -> None:
+            if WITHHOLD_INCOMPLETE_REPORTS is True and len(manager.failed_usernames) > 0:
+                print(f'Not publishing {manager.report_subpage}, cannot evaluate: {", ".join(manager.failed_usernames)}')
+                withheld_reports.append(manager.report_subpage)
+                return
+
+            publisher.submit(f'{BASEPAGE}/{manager.report_subpage}', manager.get_report_page(t_start))
+
+        ManagerScheduler(MAX_CONCURRENT_MANAGERS, release_user_data=True).run(manager_classes, submit_report)
+
+    StateStore.save(t_start, advance_watermark=all([ manager_class in manager_classes for manager_class in MANAGER_CLASSES ]))
+    FactCache.print_statistics()
+
+    if PROFILE is True:
+        Profiler.write('./logs')
+        if PROFILE_SUMMARY is True:
+            Profiler.print_summary()
+
+    if len(withheld_reports) > 0:
+        raise RuntimeError(f'Withheld {len(withheld_reports)} incomplete report(s): {", ".join(withheld_reports)}')
 
 
 if __name__=='__main__':
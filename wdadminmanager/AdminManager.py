@@ -1,4 +1,7 @@
-from .UserManager import UserWithInactivityPolicy, UserManagerWithTimestamps
+from typing import Optional
+
+from .GroupMembership import GroupMembership
+from .UserManager import User, UserWithInactivityPolicy, UserManagerWithTimestamps
 
 
 INACTIVE_ADMIN_TIME = 6  # https://www.wikidata.org/wiki/Wikidata:Administrators
@@ -6,6 +9,8 @@ INACTIVE_ADMIN_ACTIONS = 5  # including crat actions and property creations
 
 
 class Admin(UserWithInactivityPolicy):
+    __slots__ = ( 'actions', 'actions_warn', 'property_creations', 'property_creations_warn' )
+
     level:str = 'sysop'
     log_types:list[str] = [ # https://www.wikidata.org/wiki/Special:ListGroupRights
         'abusefilter',
@@ -22,11 +27,8 @@ class Admin(UserWithInactivityPolicy):
     def __init__(self, username:str, start_ts:int, warn_ts:int) -> None:
         super().__init__(username, start_ts, warn_ts)
 
-        self.actions = self.count_logged_actions(self.start_ts, Admin.log_types)
-        self.actions_warn = self.count_logged_actions(self.warn_ts, Admin.log_types)
-
-        self.property_creations = self.count_property_creations(self.start_ts)
-        self.property_creations_warn = self.count_property_creations(self.warn_ts)
+        self.actions, self.actions_warn = self.count_logged_actions_windows([ self.start_ts, self.warn_ts ], Admin.log_types)
+        self.property_creations, self.property_creations_warn = self.count_property_creations_windows([ self.start_ts, self.warn_ts ])
 
     @property
     def is_inactive(self) -> bool:
@@ -80,3 +82,29 @@ class AdminManager(UserManagerWithTimestamps):
 
     def __init__(self) -> None:
         super().__init__(INACTIVE_ADMIN_TIME)
+
+    def prefetch_user_data(self, usernames:list[str]) -> None:
+        super().prefetch_user_data(usernames)
+
+        AdminManager.prefetch_admin_actions(usernames, self.start_ts, self.warn_ts)
+
+    @staticmethod
+    def prefetch_admin_actions(usernames:list[str], start_ts:int, warn_ts:int) -> None:
+        User.prefetch_logged_actions(usernames, [ start_ts, warn_ts ], Admin.log_types)
+        User.prefetch_property_creations(usernames, [ start_ts, warn_ts ])
+
+    # managers of groups that require adminship build the Admin records of their members themselves; all facts
+    # are shared through the FactCache, so they neither wait for nor repeat the work of the AdminManager
+    @staticmethod
+    def prefetch_admins(usernames:list[str]) -> None:
+        admin_usernames = [ username for username in usernames if GroupMembership.is_member(username, Admin.level) ]
+
+        Admin.prefetch_user_data(admin_usernames)
+        AdminManager.prefetch_admin_actions(admin_usernames, *UserManagerWithTimestamps.get_timestamps(INACTIVE_ADMIN_TIME))
+
+    @staticmethod
+    def make_admin(username:str) -> Optional[Admin]:
+        if not GroupMembership.is_member(username, Admin.level):
+            return None
+
+        return Admin(username, *UserManagerWithTimestamps.get_timestamps(INACTIVE_ADMIN_TIME))
@@ -0,0 +1,151 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from threading import BoundedSemaphore, Lock, local
+from time import monotonic, perf_counter, sleep
+from typing import Any, Callable, Optional
+
+import requests
+
+from .Profiler import Profiler
+
+class ApiClient:
+    url:str = 'https://www.wikidata.org/w/api.php'
+    user_agent:str = f'{requests.utils.default_headers()["User-Agent"]} (Wikidata bot' \
+                      ' by User:MisterSynergy; mailto:mister.synergy@yahoo.com)'
+    maxlag:int = 5  # https://www.mediawiki.org/wiki/Manual:Maxlag_parameter
+    max_retries:int = 5
+    max_concurrent_requests:int = 4
+    min_request_interval:float = 0.05  # seconds between two requests, across all threads
+    timeout:float = 30
+    session_factory:Callable[[], requests.Session] = requests.Session  # replaceable by offline stand-ins
+
+    _sessions = local()  # one keep-alive session per worker thread
+    _all_sessions:list[requests.Session] = []
+    _executor:Optional[ThreadPoolExecutor] = None  # long-lived, so that its threads keep their sessions across groups
+    _lock = Lock()
+    _request_slots = BoundedSemaphore(max_concurrent_requests)  # in-flight requests, shared by all managers
+    _rate_limit_lock = Lock()
+    _next_request_time:float = 0
+
+    @classmethod
+    def session(cls) -> requests.Session:
+        session = getattr(cls._sessions, 'session', None)
+        if session is None:
+            session = cls.session_factory()
+            session.headers.update({ 'User-Agent' : cls.user_agent })
+            cls._sessions.session = session
+            with cls._lock:
+                cls._all_sessions.append(session)
+
+        return session
+
+    @classmethod
+    def executor(cls) -> ThreadPoolExecutor:
+        with cls._lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(max_workers=cls.max_concurrent_requests, thread_name_prefix='ApiClient')
+
+            return cls._executor
+
+    @classmethod
+    def close(cls) -> None:
+        with cls._lock:
+            executor, cls._executor = cls._executor, None
+            sessions, cls._all_sessions = cls._all_sessions, []
+
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+        for session in sessions:
+            session.close()
+
+    @classmethod
+    def _wait_for_rate_limit(cls) -> None:
+        with cls._rate_limit_lock:
+            now = monotonic()
+            wait = cls._next_request_time - now
+            cls._next_request_time = max(now, cls._next_request_time) + cls.min_request_interval
+
+        if wait > 0:
+            sleep(wait)
+
+    @staticmethod
+    def _retry_after(response:Optional[requests.Response], attempt:int) -> float:
+        if response is not None:
+            try:
+                return float(response.headers.get('Retry-After', ''))
+            except ValueError:
+                pass
+
+        return float(2**attempt)
+
+    @classmethod
+    def get(cls, params:dict[str, Any]) -> dict[str, Any]:
+        params = { 'format' : 'json', 'maxlag' : cls.maxlag, **params }
+        t_start = perf_counter()
+
+        for attempt in range(cls.max_retries):
+            cls._wait_for_rate_limit()
+
+            try:
+                with cls._request_slots:
+                    response = cls.session().get(url=cls.url, params=params, timeout=cls.timeout)
+            except requests.RequestException:
+                sleep(cls._retry_after(None, attempt))
+                continue
+
+            if response.status_code == 429 or response.status_code >= 500:
+                sleep(cls._retry_after(response, attempt))
+                continue
+
+            try:
+                payload = response.json()
+            except ValueError:  # e.g. an HTML error page from a proxy
+                sleep(cls._retry_after(response, attempt))
+                continue
+
+            if payload.get('error', {}).get('code') == 'maxlag':
+                sleep(cls._retry_after(response, attempt))
+                continue
+
+            if Profiler.enabled:
+                Profiler.record('api', perf_counter()-t_start, 1, len(getattr(response, 'content', b'')))
+
+            return payload
+
+        raise RuntimeError(f'Cannot query API with {params}')
+
+    @classmethod
+    def query_last_logged_activity(cls, username:str, since:int=0) -> int:
+        params = {
+            'action' : 'query',
+            'list' : 'logevents',
+            'leprop' : 'timestamp',
+            'leuser' : f'{username}',
+            'lelimit' : '1'
+        }
+        if since > 0:
+            params['leend'] = datetime.strptime(str(since), '%Y%m%d%H%M%S').strftime('%Y-%m-%dT%H:%M:%SZ')
+
+        payload = cls.get(params)
+
+        logevents = payload.get('query', {}).get('logevents', [])
+        if len(logevents) == 0:
+            return 0
+
+        timestamp_str = logevents[0].get('timestamp', '')
+        if timestamp_str == '':
+            return 0
+
+        return int(datetime.strptime(timestamp_str, '%Y-%m-%dT%H:%M:%SZ').strftime('%Y%m%d%H%M%S'))
+
+    @classmethod
+    def query_last_logged_activities(cls, usernames:list[str], since:int=0) -> dict[str, int]:
+        manager = Profiler.current_manager()
+
+        timestamps = cls.executor().map(
+            lambda username: Profiler.run_as(manager, cls.query_last_logged_activity, username, since),
+            usernames
+        )
+
+        return dict(zip(usernames, timestamps))
@@ -5,6 +5,8 @@ from .UserManager import UserWithoutInactivityPolicy, UserManager
 
 
 class Bot(UserWithoutInactivityPolicy):
+    __slots__ = ()
+
     level:str = 'bot'
 
 
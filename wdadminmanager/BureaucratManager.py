@@ -1,5 +1,3 @@
-from typing import Optional
-
 import phpserialize
 
 from .UserManager import User, UserWithInactivityPolicy, UserManagerWithTimestamps
@@ -12,15 +10,16 @@ INACTIVE_CRAT_ACTIONS = 10  # including crat actions and property creations
 
 
 class Bureaucrat(UserWithInactivityPolicy, RequiresAdmin):
+    __slots__ = RequiresAdmin.admin_slots + ( 'admin_actions', 'admin_actions_warn', 'bureaucrat_actions' )
+
     level:str = 'bureaucrat'
     log_types:list[str] = Admin.log_types
 
-    def __init__(self, username:str, start_ts:int, warn_ts:int, admin:Optional[User]) -> None:
+    def __init__(self, username:str, start_ts:int, warn_ts:int) -> None:
         UserWithInactivityPolicy.__init__(self, username, start_ts, warn_ts)
-        RequiresAdmin.__init__(self, admin)
+        RequiresAdmin.__init__(self, username)
 
-        self.admin_actions = self.count_logged_actions(self.start_ts, Bureaucrat.log_types)
-        self.admin_actions_warn = self.count_logged_actions(self.warn_ts, Bureaucrat.log_types)
+        self.admin_actions, self.admin_actions_warn = self.count_logged_actions_windows([ self.start_ts, self.warn_ts ], Bureaucrat.log_types)
 
         self.count_bureaucrat_actions()
 
@@ -31,9 +30,7 @@ class Bureaucrat(UserWithInactivityPolicy, RequiresAdmin):
         add_rights = [ 'accountcreator', 'bot', 'bureaucrat', 'confirmed', 'flood', 'interface-admin', 'sysop', 'translationadmin', 'wikidata-staff' ]
         remove_rights = [ 'accountcreator', 'bot', 'confirmed', 'flood', 'interface-admin', 'translationadmin', 'wikidata-staff' ]
 
-        for dct in self.get_rights_actions(self.start_ts):
-            params = dct.get('log_params', '')
-
+        for params, in self.get_rights_actions(self.start_ts):
             try:
                 params_loaded = phpserialize.loads(params)
             except ValueError:
@@ -126,16 +123,11 @@ class BureaucratManager(UserManagerWithTimestamps):
     report_subpage = 'Bureaucrat'
     report_template = 'bureaucrat.template'
 
-    def __init__(self, admin_manager:AdminManager) -> None:
-        self.admin_manager = admin_manager
+    def __init__(self) -> None:
         super().__init__(INACTIVE_CRAT_TIME)
 
-    def populate_user_data(self) -> None:
-        self.user_data = {}
-        for username in self.__class__.query_users(self.__class__.user_class.level):
-            self.user_data[username] = self.__class__.user_class(
-                username,
-                self.start_ts,
-                self.warn_ts,
-                self.admin_manager.user_data.get(username)
-            )
+    def prefetch_user_data(self, usernames:list[str]) -> None:
+        super().prefetch_user_data(usernames)
+
+        User.prefetch_logged_actions(usernames, [ self.start_ts, self.warn_ts ], Bureaucrat.log_types)
+        AdminManager.prefetch_admins(usernames)
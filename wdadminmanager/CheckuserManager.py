@@ -5,6 +5,8 @@ from .UserManager import UserWithElevatedRights, UserManager
 
 
 class Checkuser(UserWithElevatedRights):
+    __slots__ = ()
+
     level:str = 'checkuser'
 
 
@@ -5,6 +5,8 @@ from .UserManager import UserWithoutInactivityPolicy, UserManager
 
 
 class ConfirmedUser(UserWithoutInactivityPolicy):
+    __slots__ = ()
+
     level:str = 'confirmed'
 
 
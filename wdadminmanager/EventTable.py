@@ -0,0 +1,202 @@
+from threading import Lock
+from typing import Any, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # only needed if EventTable is used as the window count backend
+
+from .GroupQuery import GroupQuery
+from .Replica import Replica
+
+
+TIMESTAMP_SPAN = 10**12  # exceeds any difference of two MediaWiki timestamps (YYYYMMDDHHMMSS) within a century
+
+
+class EventTable:  # events of the requested actors since the earliest threshold, as columnar arrays sorted by actor and timestamp
+    # each query selects actor id, timestamp and kind of the events in {actor_ids} since {since}, restricted to {kinds} if given
+    sources:dict[str, str] = {
+        'logged_actions' : """SELECT
+          log_actor,
+          log_timestamp,
+          log_type
+        FROM
+          logging_userindex
+        WHERE
+          log_actor IN ({actor_ids})
+          AND log_timestamp>={since}
+          AND log_type IN ({kinds})""",
+        'property_creations' : """SELECT
+          rev_actor,
+          rev_timestamp,
+          page_namespace
+        FROM
+          page
+            JOIN revision_userindex ON page_id=rev_page
+        WHERE
+          rev_parent_id=0
+          AND rev_timestamp>={since}
+          AND page_namespace=120
+          AND rev_actor IN ({actor_ids})""",
+        'mediawiki_namespace_edits' : """SELECT
+          rev_actor,
+          rev_timestamp,
+          page_namespace
+        FROM
+          revision_userindex
+            JOIN page ON rev_page=page_id
+        WHERE
+          rev_actor IN ({actor_ids})
+          AND rev_timestamp>={since}
+          AND page_namespace=8
+          AND page_content_model NOT IN ('css', 'sanitized-css', 'javascript', 'json')""",
+        'jscss_edits' : """SELECT
+          rev_actor,
+          rev_timestamp,
+          page_namespace
+        FROM
+          revision_userindex
+            JOIN actor_revision ON rev_actor=actor_id
+            JOIN page ON rev_page=page_id
+        WHERE
+          rev_actor IN ({actor_ids})
+          AND rev_timestamp>={since}
+          AND page_content_model IN ('css', 'sanitized-css', 'javascript', 'json')
+          AND NOT (page_namespace IN (2, 3) AND SUBSTRING(page_title, 1, LENGTH(actor_name))=REPLACE(actor_name, ' ', '_'))"""
+    }
+
+    _tables:dict[tuple[str, Optional[tuple[str, ...]]], 'EventTable'] = {}  # (source, kinds) -> table
+    _tables_lock = Lock()
+
+    def __init__(self, source:str, kinds:Optional[list[str]]=None) -> None:
+        if np is None:
+            raise RuntimeError('The event table window count backend requires numpy')
+
+        # only the requested kinds are read, e.g. not the high-volume patrol log for admin actions
+        self.query = EventTable.sources[source].replace('{kinds}', GroupQuery.in_list(kinds or []))
+        self.since:Optional[int] = None
+        self.loaded_actor_ids:set[int] = set()
+        self.kind_codes:dict[Any, int] = {}
+
+        self.actor_ids = np.empty(0, dtype=np.int64)
+        self.timestamps = np.empty(0, dtype=np.int64)
+        self.kinds = np.empty(0, dtype=np.int32)
+
+        self._keys:dict[Optional[frozenset], tuple[Any, Any]] = {}  # kinds -> (distinct actor ids, sorted search keys)
+        self._lock = Lock()
+
+    @classmethod
+    def get(cls, source:str, kinds:Optional[list[str]]=None) -> 'EventTable':  # one table per source and set of kinds
+        key = (source, None if kinds is None else tuple(sorted(set(kinds))))
+        with cls._tables_lock:
+            if key not in cls._tables:
+                cls._tables[key] = cls(source, kinds)
+
+            return cls._tables[key]
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._tables_lock:
+            cls._tables.clear()
+
+    def ensure(self, actor_ids:list[int], since:int) -> None:
+        if self.since is None or since < self.since:  # the window grows: read everything again
+            self._replace(sorted(self.loaded_actor_ids | set(actor_ids)), since)
+            return
+
+        missing_actor_ids = sorted(set(actor_ids) - self.loaded_actor_ids)
+        if len(missing_actor_ids) > 0:
+            self._append(missing_actor_ids, self.since)
+
+    def _read(self, actor_ids:list[int], since:int) -> tuple[Any, Any, Any]:
+        actor_column:list[int] = []
+        timestamp_column:list[int] = []
+        kind_column:list[int] = []
+
+        for chunk in GroupQuery.chunks(actor_ids):
+            query = self.query.format(actor_ids=', '.join([ str(actor_id) for actor_id in chunk ]), since=since)
+            for actor_id, timestamp, kind in Replica.stream(query, dictionary=False):
+                kind = kind.decode('utf8') if isinstance(kind, bytes) else kind
+                actor_column.append(actor_id)
+                timestamp_column.append(int(timestamp))
+                kind_column.append(self.kind_codes.setdefault(kind, len(self.kind_codes)))
+
+        return np.array(actor_column, dtype=np.int64), np.array(timestamp_column, dtype=np.int64), np.array(kind_column, dtype=np.int32)
+
+    def _replace(self, actor_ids:list[int], since:int) -> None:
+        self.actor_ids, self.timestamps, self.kinds = self._read(actor_ids, since)
+        self.since = since
+        self.loaded_actor_ids = set(actor_ids)
+        self._sort()
+
+    def _append(self, actor_ids:list[int], since:int) -> None:
+        new_actor_ids, new_timestamps, new_kinds = self._read(actor_ids, since)
+        self.actor_ids = np.concatenate([ self.actor_ids, new_actor_ids ])
+        self.timestamps = np.concatenate([ self.timestamps, new_timestamps ])
+        self.kinds = np.concatenate([ self.kinds, new_kinds ])
+        self.loaded_actor_ids.update(actor_ids)
+        self._sort()
+
+    def _sort(self) -> None:
+        order = np.lexsort((self.timestamps, self.actor_ids))
+        self.actor_ids = self.actor_ids[order]
+        self.timestamps = self.timestamps[order]
+        self.kinds = self.kinds[order]
+        self._keys = {}
+
+    def _get_keys(self, kinds:Optional[list[str]]) -> tuple[Any, Any]:
+        selection = None if kinds is None else frozenset(kinds)
+        if selection not in self._keys:
+            if selection is None:
+                actor_ids, timestamps = self.actor_ids, self.timestamps
+            else:
+                mask = np.isin(self.kinds, [ self.kind_codes[kind] for kind in selection if kind in self.kind_codes ])
+                actor_ids, timestamps = self.actor_ids[mask], self.timestamps[mask]
+
+            # (actor rank, timestamp) folded into one sorted int64 key, so that one searchsorted call answers all counts
+            distinct_actor_ids, ranks = np.unique(actor_ids, return_inverse=True)
+            self._keys[selection] = (distinct_actor_ids, ranks.astype(np.int64)*TIMESTAMP_SPAN + (timestamps - self.since))
+
+        return self._keys[selection]
+
+    def count_windows(self, usernames:list[str], thresholds:list[int], kinds:Optional[list[str]]=None) -> dict[str, list[int]]:
+        result = { username : [ 0 for _ in thresholds ] for username in usernames }
+        actor_ids_by_username = GroupQuery.resolve_actor_ids(usernames)
+        if len(actor_ids_by_username) == 0:
+            return result
+
+        with self._lock:
+            self.ensure(list(actor_ids_by_username.values()), min(thresholds))
+            distinct_actor_ids, keys = self._get_keys(kinds)
+
+            if len(distinct_actor_ids) == 0:
+                return result
+
+            requested = np.array(list(actor_ids_by_username.values()), dtype=np.int64)
+            ranks = np.minimum(np.searchsorted(distinct_actor_ids, requested), len(distinct_actor_ids)-1)
+            present = distinct_actor_ids[ranks] == requested
+
+            ends = np.searchsorted(keys, (ranks+1)*TIMESTAMP_SPAN)
+            starts = np.searchsorted(keys, ranks[:, None]*TIMESTAMP_SPAN + (np.array(thresholds, dtype=np.int64)[None, :] - self.since))
+            counts = (ends[:, None] - starts) * present[:, None]
+
+        for username, user_counts in zip(actor_ids_by_username.keys(), counts.tolist()):
+            result[username] = user_counts
+
+        return result
+
+    @staticmethod
+    def count_logged_actions_windows(usernames:list[str], thresholds:list[int], log_types:list[str]) -> dict[str, list[int]]:
+        return EventTable.get('logged_actions', log_types).count_windows(usernames, thresholds)
+
+    @staticmethod
+    def count_property_creations_windows(usernames:list[str], thresholds:list[int]) -> dict[str, list[int]]:
+        return EventTable.get('property_creations').count_windows(usernames, thresholds)
+
+    @staticmethod
+    def count_mediawiki_namespace_edits_windows(usernames:list[str], thresholds:list[int]) -> dict[str, list[int]]:
+        return EventTable.get('mediawiki_namespace_edits').count_windows(usernames, thresholds)
+
+    @staticmethod
+    def count_jscss_edits_windows(usernames:list[str], thresholds:list[int]) -> dict[str, list[int]]:
+        return EventTable.get('jscss_edits').count_windows(usernames, thresholds)
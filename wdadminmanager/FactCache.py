@@ -0,0 +1,89 @@
+from threading import Lock
+from typing import Any, Callable, Iterable
+
+
+class FactCache:  # run-scoped cache of per-user facts, shared by all managers
+    _facts:dict[str, dict[str, Any]] = {}  # fact key -> username -> value
+    _hits:dict[str, int] = {}
+    _misses:dict[str, int] = {}
+    _lock = Lock()
+
+    @classmethod
+    def get_or_compute(cls, fact:str, username:str, compute:Callable[[], Any]) -> Any:
+        with cls._lock:
+            values = cls._facts.get(fact, {})
+            if username in values:
+                cls._hits[fact] = cls._hits.get(fact, 0) + 1
+                return values[username]
+
+        value = compute()
+
+        with cls._lock:
+            cls._facts.setdefault(fact, {})[username] = value
+            cls._misses[fact] = cls._misses.get(fact, 0) + 1
+
+        return value
+
+    @classmethod
+    def get_or_compute_many(cls, facts:list[str], username:str, compute:Callable[[], list[Any]]) -> list[Any]:  # facts computed together
+        with cls._lock:
+            if all([ username in cls._facts.get(fact, {}) for fact in facts ]):
+                for fact in facts:
+                    cls._hits[fact] = cls._hits.get(fact, 0) + 1
+                return [ cls._facts[fact][username] for fact in facts ]
+
+        values = compute()
+
+        with cls._lock:
+            for fact, value in zip(facts, values):
+                cls._facts.setdefault(fact, {})[username] = value
+                cls._misses[fact] = cls._misses.get(fact, 0) + 1
+
+        return values
+
+    @classmethod
+    def missing(cls, fact:str, usernames:Iterable[str]) -> list[str]:
+        with cls._lock:
+            values = cls._facts.get(fact, {})
+            return [ username for username in usernames if username not in values ]
+
+    @classmethod
+    def put_many(cls, fact:str, values:dict[str, Any], fetched:bool=True) -> None:
+        with cls._lock:
+            cls._facts.setdefault(fact, {}).update(values)
+            if fetched:
+                cls._misses[fact] = cls._misses.get(fact, 0) + len(values)
+
+    @classmethod
+    def get_many(cls, fact:str, usernames:Iterable[str]) -> dict[str, Any]:  # cached values only
+        with cls._lock:
+            values = cls._facts.get(fact, {})
+            return { username : values[username] for username in usernames if username in values }
+
+    @classmethod
+    def get_values(cls, fact:str) -> dict[str, Any]:
+        with cls._lock:
+            return dict(cls._facts.get(fact, {}))
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._facts.clear()
+            cls._hits.clear()
+            cls._misses.clear()
+
+    @classmethod
+    def get_statistics(cls) -> dict[str, tuple[int, int]]:
+        with cls._lock:
+            facts = sorted(set(cls._hits) | set(cls._misses))
+            return { fact : (cls._hits.get(fact, 0), cls._misses.get(fact, 0)) for fact in facts }
+
+    @classmethod
+    def print_statistics(cls) -> None:
+        statistics = cls.get_statistics()
+        total_hits = sum([ hits for hits, _ in statistics.values() ])
+        total_misses = sum([ misses for _, misses in statistics.values() ])
+
+        print(f'Fact cache: {total_hits} hits, {total_misses} misses')
+        for fact, (hits, misses) in statistics.items():
+            print(f'  {fact}: {hits} hits, {misses} misses')
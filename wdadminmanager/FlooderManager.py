@@ -5,6 +5,8 @@ from .UserManager import UserWithoutInactivityPolicy, UserManager
 
 
 class Flooder(UserWithoutInactivityPolicy):
+    __slots__ = ()
+
     level:str = 'flood'
 
 
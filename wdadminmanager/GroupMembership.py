@@ -0,0 +1,62 @@
+from threading import Lock
+
+from .GroupQuery import GroupQuery
+from .Replica import Replica
+
+
+class GroupMembership:  # run-scoped index of group members; all requested groups are read with a single query
+    _groups:dict[str, list[str]] = {}  # group -> usernames, ordered by user_name
+    _users:dict[str, set[str]] = {}  # username -> groups among the loaded ones
+    _lock = Lock()
+
+    @classmethod
+    def load(cls, groups:list[str]) -> None:
+        with cls._lock:
+            missing_groups = [ group for group in dict.fromkeys(groups) if group not in cls._groups ]
+            if len(missing_groups) == 0:
+                return
+
+            query = f"""SELECT
+              user_name,
+              ug_group
+            FROM
+              user
+                JOIN user_groups ON user_id=ug_user
+            WHERE
+              ug_group IN ({GroupQuery.in_list(missing_groups)})
+            ORDER BY
+              user_name ASC"""
+
+            groups:dict[str, list[str]] = { group : [] for group in missing_groups }
+            for user_name, ug_group in Replica.stream(query, dictionary=False):
+                username = user_name.decode('utf8')
+                group = ug_group.decode('utf8') if isinstance(ug_group, bytes) else ug_group
+                groups[group].append(username)
+
+            # published only once the query has completed, so that a failed one is not cached as a partial member list
+            for group, usernames in groups.items():
+                cls._groups[group] = usernames
+                for username in usernames:
+                    cls._users.setdefault(username, set()).add(group)
+
+    @classmethod
+    def get_members(cls, group:str) -> list[str]:
+        cls.load([ group ])
+
+        return list(cls._groups[group])
+
+    @classmethod
+    def is_member(cls, username:str, group:str) -> bool:
+        cls.load([ group ])
+
+        return group in cls._users.get(username, set())
+
+    @classmethod
+    def get_usernames(cls) -> list[str]:  # members of any loaded group
+        return list(cls._users.keys())
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._groups.clear()
+            cls._users.clear()
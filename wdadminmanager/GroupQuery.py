@@ -0,0 +1,280 @@
+from typing import Any, Iterator, Optional
+
+import phpserialize
+
+from .FactCache import FactCache
+from .Replica import Replica
+
+
+BATCH_SIZE = 500  # usernames or actor ids per IN (...) list
+
+
+class GroupQuery:
+    @staticmethod
+    def chunks(values:list[Any]) -> Iterator[list[Any]]:
+        for offset in range(0, len(values), BATCH_SIZE):
+            yield values[offset:offset+BATCH_SIZE]
+
+    @staticmethod
+    def in_list(usernames:list[str]) -> str:
+        return ', '.join([ "'{}'".format(username.replace("'", "''")) for username in usernames ])
+
+    @staticmethod
+    def _collect(usernames:list[str], query:str, key:str, value:str, default:Any=0) -> dict[str, Any]:
+        result = { username : default for username in usernames }
+
+        for chunk in GroupQuery.chunks(usernames):
+            for row in Replica.query(query.format(usernames=GroupQuery.in_list(chunk))):
+                username = row.get(key, b'').decode('utf8')
+                result[username] = row.get(value) or default
+
+        return result
+
+    @staticmethod
+    def resolve_actor_ids(usernames:list[str]) -> dict[str, int]:  # cached for the run; users without an actor are left out
+        missing_usernames = FactCache.missing('actor_id', usernames)
+        if len(missing_usernames) > 0:
+            query = """SELECT
+              actor_name,
+              actor_id
+            FROM
+              actor
+            WHERE
+              actor_name IN ({usernames})"""
+
+            FactCache.put_many('actor_id', GroupQuery._collect(missing_usernames, query, 'actor_name', 'actor_id'))
+
+        return { username : actor_id for username, actor_id in FactCache.get_many('actor_id', usernames).items() if actor_id > 0 }
+
+    @staticmethod
+    def _collect_by_actor(usernames:list[str], query:str, value:str, default:Any=0) -> dict[str, Any]:  # query selects actor_id and filters on {actor_ids}
+        result = { username : default for username in usernames }
+        usernames_by_actor_id = { actor_id : username for username, actor_id in GroupQuery.resolve_actor_ids(usernames).items() }
+
+        for chunk in GroupQuery.chunks(list(usernames_by_actor_id.keys())):
+            for row in Replica.query(query.format(actor_ids=', '.join([ str(actor_id) for actor_id in chunk ]))):
+                result[usernames_by_actor_id[row.get('actor_id')]] = row.get(value) or default
+
+        return result
+
+    @staticmethod
+    def query_last_edit_activity(usernames:list[str], since:int=0) -> dict[str, int]:
+        timestamp_condition = f'AND rev_timestamp>={since}' if since > 0 else ''
+
+        query = f"""SELECT
+          rev_actor AS actor_id,
+          MAX(rev_timestamp) AS rev_timestamp
+        FROM
+          revision_userindex
+        WHERE
+          rev_actor IN ({{actor_ids}})
+          {timestamp_condition}
+        GROUP BY
+          rev_actor"""
+
+        result = GroupQuery._collect_by_actor(usernames, query, 'rev_timestamp')
+
+        return { username : int(timestamp) for username, timestamp in result.items() }
+
+    @staticmethod
+    def query_last_logged_activity(usernames:list[str], since:int=0) -> dict[str, int]:
+        timestamp_condition = f'AND log_timestamp>={since}' if since > 0 else ''
+
+        query = f"""SELECT
+          log_actor AS actor_id,
+          MAX(log_timestamp) AS log_timestamp
+        FROM
+          logging_userindex
+        WHERE
+          log_actor IN ({{actor_ids}})
+          {timestamp_condition}
+        GROUP BY
+          log_actor"""
+
+        result = GroupQuery._collect_by_actor(usernames, query, 'log_timestamp')
+
+        return { username : int(timestamp) for username, timestamp in result.items() }
+
+    @staticmethod
+    def query_editcount(usernames:list[str]) -> dict[str, int]:
+        query = """SELECT
+          user_name,
+          user_editcount
+        FROM
+          user
+        WHERE
+          user_name IN ({usernames})"""
+
+        return GroupQuery._collect(usernames, query, 'user_name', 'user_editcount')
+
+    @staticmethod
+    def stream_rights_actions(username:str, since:int) -> Iterator[tuple[bytes]]:  # log_params of rights changes made by the user
+        actor_id = GroupQuery.resolve_actor_ids([ username ]).get(username)
+        if actor_id is None:
+            return iter([])
+
+        query = f"""SELECT
+          log_params
+        FROM
+          logging_userindex
+        WHERE
+          log_actor={actor_id}
+          AND log_timestamp>={since}
+          AND log_type='rights'"""
+
+        return Replica.stream(query, dictionary=False)
+
+    @staticmethod
+    def query_rights_changes(usernames:list[str], database:str='wikidatawiki') -> dict[str, list[dict[str, Any]]]:
+        title_suffix = '' if database=='wikidatawiki' else '@wikidatawiki'  # some logs are located in metawiki
+        usernames_by_title = { f'{username.replace(" ", "_")}{title_suffix}' : username for username in usernames }
+        result:dict[str, list[dict[str, Any]]] = { username : [] for username in usernames }
+
+        for chunk in GroupQuery.chunks(list(usernames_by_title.keys())):
+            query = f"""SELECT
+              log_id,
+              log_title,
+              log_timestamp,
+              log_params
+            FROM
+              logging
+            WHERE
+              log_type='rights'
+              AND log_title IN ({GroupQuery.in_list(chunk)})"""
+
+            for row in Replica.query(query, database):
+                username = usernames_by_title.get(row.pop('log_title', b'').decode('utf8'))
+                if username is not None:
+                    result[username].append(row)
+
+        return result
+
+    @staticmethod
+    def parse_rename(log_params:bytes) -> Optional[tuple[str, str]]:  # (previous username, current username) of a gblrename entry
+        try:
+            params = phpserialize.loads(log_params)
+        except ValueError:  # old log_params format, to be ignored
+            return None
+
+        if b'4::olduser' not in params or b'5::newuser' not in params:
+            return None
+
+        return params[b'4::olduser'].decode('utf8'), params[b'5::newuser'].decode('utf8')
+
+    @staticmethod
+    def query_previous_usernames(usernames:list[str]) -> dict[str, Optional[str]]:  # global renames to the given names
+        usernames_by_title = { f'CentralAuth/{username.replace(" ", "_")}' : username for username in usernames }
+        result:dict[str, Optional[str]] = { username : None for username in usernames }
+
+        for chunk in GroupQuery.chunks(list(usernames_by_title.keys())):
+            query = f"""SELECT
+              log_title,
+              log_params
+            FROM
+              logging
+            WHERE
+              log_type='gblrename'
+              AND log_action='rename'
+              AND log_title IN ({GroupQuery.in_list(chunk)})"""
+
+            for row in Replica.query(query, 'metawiki'):
+                username = usernames_by_title.get(row.get('log_title', b'').decode('utf8'))
+                rename = GroupQuery.parse_rename(row.get('log_params', b''))
+                if username is None or rename is None or result[username] is not None:
+                    continue
+
+                previous_username, current_username = rename
+                if current_username == username.replace(' ', '_'):
+                    result[username] = previous_username
+
+        return result
+
+    @staticmethod
+    def window_columns(column:str, thresholds:list[int]) -> str:  # conditional aggregation: one count per threshold from a single scan
+        return ',\n          '.join([ f'SUM({column}>={threshold}) AS cnt_{index}' for index, threshold in enumerate(thresholds) ])
+
+    @staticmethod
+    def _collect_windows(usernames:list[str], query:str, thresholds:list[int]) -> dict[str, list[int]]:  # query as for _collect_by_actor
+        result = { username : [ 0 for _ in thresholds ] for username in usernames }
+        usernames_by_actor_id = { actor_id : username for username, actor_id in GroupQuery.resolve_actor_ids(usernames).items() }
+
+        for chunk in GroupQuery.chunks(list(usernames_by_actor_id.keys())):
+            for row in Replica.query(query.format(actor_ids=', '.join([ str(actor_id) for actor_id in chunk ]))):
+                username = usernames_by_actor_id[row.get('actor_id')]
+                result[username] = [ int(row.get(f'cnt_{index}') or 0) for index in range(len(thresholds)) ]
+
+        return result
+
+    @staticmethod
+    def count_logged_actions_windows(usernames:list[str], thresholds:list[int], log_types:list[str]) -> dict[str, list[int]]:
+        log_types_concatenated = "', '".join(log_types)
+
+        query = f"""SELECT
+          log_actor AS actor_id,
+          {GroupQuery.window_columns('log_timestamp', thresholds)}
+        FROM
+          logging_userindex
+        WHERE
+          log_actor IN ({{actor_ids}})
+          AND log_timestamp>={min(thresholds)}
+          AND log_type IN ('{log_types_concatenated}')
+        GROUP BY
+          log_actor"""
+
+        return GroupQuery._collect_windows(usernames, query, thresholds)
+
+    @staticmethod
+    def count_property_creations_windows(usernames:list[str], thresholds:list[int]) -> dict[str, list[int]]:
+        query = f"""SELECT
+          rev_actor AS actor_id,
+          {GroupQuery.window_columns('rev_timestamp', thresholds)}
+        FROM
+          page
+            JOIN revision_userindex ON page_id=rev_page
+        WHERE
+          rev_parent_id=0
+          AND rev_timestamp>={min(thresholds)}
+          AND page_namespace=120
+          AND rev_actor IN ({{actor_ids}})
+        GROUP BY
+          rev_actor"""
+
+        return GroupQuery._collect_windows(usernames, query, thresholds)
+
+    @staticmethod
+    def count_mediawiki_namespace_edits_windows(usernames:list[str], thresholds:list[int]) -> dict[str, list[int]]:
+        query = f"""SELECT
+          rev_actor AS actor_id,
+          {GroupQuery.window_columns('rev_timestamp', thresholds)}
+        FROM
+          revision_userindex
+            JOIN page ON rev_page=page_id
+        WHERE
+          rev_actor IN ({{actor_ids}})
+          AND rev_timestamp>={min(thresholds)}
+          AND page_namespace=8
+          AND page_content_model NOT IN ('css', 'sanitized-css', 'javascript', 'json')
+        GROUP BY
+          rev_actor"""
+
+        return GroupQuery._collect_windows(usernames, query, thresholds)
+
+    @staticmethod
+    def count_jscss_edits_windows(usernames:list[str], thresholds:list[int]) -> dict[str, list[int]]:
+        # edits to pages in the user's own userspace (incl. subpages) do not count; actor is joined for its name only
+        query = f"""SELECT
+          rev_actor AS actor_id,
+          {GroupQuery.window_columns('rev_timestamp', thresholds)}
+        FROM
+          revision_userindex
+            JOIN actor_revision ON rev_actor=actor_id
+            JOIN page ON rev_page=page_id
+        WHERE
+          rev_actor IN ({{actor_ids}})
+          AND rev_timestamp>={min(thresholds)}
+          AND page_content_model IN ('css', 'sanitized-css', 'javascript', 'json')
+          AND NOT (page_namespace IN (2, 3) AND SUBSTRING(page_title, 1, LENGTH(actor_name))=REPLACE(actor_name, ' ', '_'))
+        GROUP BY
+          rev_actor"""
+
+        return GroupQuery._collect_windows(usernames, query, thresholds)
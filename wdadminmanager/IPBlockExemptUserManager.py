@@ -5,6 +5,8 @@ from .UserManager import UserWithoutInactivityPolicy, UserManager
 
 
 class IPBlockExemptUser(UserWithoutInactivityPolicy):
+    __slots__ = ()
+
     level:str = 'ipblock-exempt'
 
 
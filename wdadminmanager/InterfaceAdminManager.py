@@ -1,4 +1,4 @@
-from .UserManager import UserWithInactivityPolicy, UserManagerWithTimestamps
+from .UserManager import User, UserWithInactivityPolicy, UserManagerWithTimestamps
 
 
 # https://www.wikidata.org/wiki/Wikidata:Interface_administrators
@@ -8,6 +8,8 @@ INACTIVE_UIADMIN_ACTIONS = 1  # int
 
 
 class InterfaceAdmin(UserWithInactivityPolicy):
+    __slots__ = ( 'start_ts_any', 'warn_ts_any', 'mediawiki_actions', 'mediawiki_actions_warn', 'jscss_actions', 'jscss_actions_warn' )
+
     level:str = 'interface-admin'
 
     def __init__(self, username:str, start_ts:int, warn_ts:int, start_ts_any:int, warn_ts_any:int) -> None:
@@ -16,11 +18,9 @@ class InterfaceAdmin(UserWithInactivityPolicy):
         self.start_ts_any = start_ts_any
         self.warn_ts_any = warn_ts_any
 
-        self.mediawiki_actions = self.count_mediawiki_namespace_edits(self.start_ts)
-        self.mediawiki_actions_warn = self.count_mediawiki_namespace_edits(self.warn_ts)
+        self.mediawiki_actions, self.mediawiki_actions_warn = self.count_mediawiki_namespace_edits_windows([ self.start_ts, self.warn_ts ])
 
-        self.jscss_actions = self.count_jscss_edits(self.start_ts)
-        self.jscss_actions_warn = self.count_jscss_edits(self.warn_ts)
+        self.jscss_actions, self.jscss_actions_warn = self.count_jscss_edits_windows([ self.start_ts, self.warn_ts ])
 
     @property
     def interfaceadmin_actions(self) -> int:
@@ -99,13 +99,17 @@ class InterfaceAdminManager(UserManagerWithTimestamps):
         self.start_ts_any, self.warn_ts_any = UserManagerWithTimestamps.get_timestamps(INACTIVE_UIADMIN_TIME_ANY)
         super().__init__(INACTIVE_UIADMIN_TIME)
 
-    def populate_user_data(self) -> None:
-        self.user_data = {}
-        for username in self.__class__.query_users(self.__class__.user_class.level):
-            self.user_data[username] = self.__class__.user_class(
-                username,
-                self.start_ts,
-                self.warn_ts,
-                self.start_ts_any,
-                self.warn_ts_any
-            )
+    def prefetch_user_data(self, usernames:list[str]) -> None:
+        super().prefetch_user_data(usernames)
+
+        User.prefetch_mediawiki_namespace_edits(usernames, [ self.start_ts, self.warn_ts ])
+        User.prefetch_jscss_edits(usernames, [ self.start_ts, self.warn_ts ])
+
+    def make_user(self, username:str) -> User:
+        return self.__class__.user_class(
+            username,
+            self.start_ts,
+            self.warn_ts,
+            self.start_ts_any,
+            self.warn_ts_any
+        )
@@ -0,0 +1,61 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Type
+
+from .GroupMembership import GroupMembership
+from .GroupQuery import GroupQuery
+from .Replica import Replica
+from .UserManager import UserManager
+from .AdminManager import AdminManager
+from .BureaucratManager import BureaucratManager
+from .OversighterManager import OversighterManager
+from .CheckuserManager import CheckuserManager
+
+from .InterfaceAdminManager import InterfaceAdminManager
+from .TranslationAdminManager import TranslationAdminManager
+from .PropertyCreatorManager import PropertyCreatorManager
+
+from .BotManager import BotManager
+from .FlooderManager import FlooderManager
+
+from .IPBlockExemptUserManager import IPBlockExemptUserManager
+from .RollbackerManager import RollbackerManager
+from .ConfirmedUserManager import ConfirmedUserManager
+
+
+class ManagerScheduler:
+    manager_classes:list[Type[UserManager]] = [
+        AdminManager,
+        BureaucratManager,
+        OversighterManager,
+        CheckuserManager,
+        InterfaceAdminManager,
+        TranslationAdminManager,
+        PropertyCreatorManager,
+        BotManager,
+        FlooderManager,
+        IPBlockExemptUserManager,
+        RollbackerManager,
+        ConfirmedUserManager
+    ]
+
+    def __init__(self, max_workers:int=Replica.max_connections, release_user_data:bool=False) -> None:
+        self.max_workers = max(1, max_workers)
+        self.release_user_data = release_user_data
+
+    def run(self, manager_classes:list[Type[UserManager]], on_complete:Callable[[UserManager], None]) -> dict[Type[UserManager], UserManager]:
+        GroupMembership.load([ manager_class.user_class.level for manager_class in manager_classes ])  # one query for all groups
+        GroupQuery.resolve_actor_ids(GroupMembership.get_usernames())  # one batched lookup for all members
+
+        completed:dict[Type[UserManager], UserManager] = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            running = { executor.submit(manager_class) : manager_class for manager_class in manager_classes }
+            for future in as_completed(running):
+                manager_class = running[future]
+                completed[manager_class] = future.result()
+                on_complete(completed[manager_class])
+
+                if self.release_user_data:  # managers do not share instances, so a reported one is not needed anymore
+                    completed[manager_class].release_user_data()
+
+        return completed
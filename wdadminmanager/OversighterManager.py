@@ -1,6 +1,4 @@
-from typing import Optional
-
-from .UserManager import User, UserWithElevatedRights, UserManager
+from .UserManager import UserWithElevatedRights, UserManager
 from .AdminManager import Admin, AdminManager
 from .RequiresAdmin import RequiresAdmin
 
@@ -9,12 +7,14 @@ from .RequiresAdmin import RequiresAdmin
 
 
 class Oversighter(UserWithElevatedRights, RequiresAdmin):
+    __slots__ = RequiresAdmin.admin_slots
+
     level:str = 'suppress'
     former_levels:list[str] = [ 'oversight' ]
 
-    def __init__(self, username:str, admin:Optional[User]) -> None:
+    def __init__(self, username:str) -> None:
         UserWithElevatedRights.__init__(self, username)
-        RequiresAdmin.__init__(self, admin)
+        RequiresAdmin.__init__(self, username)
 
     @property
     def admin_inactivity_class(self) -> str:
@@ -66,14 +66,7 @@ class OversighterManager(UserManager):
     report_subpage = 'Oversighter'
     report_template = 'oversight.template'
 
-    def __init__(self, admin_manager:AdminManager) -> None:
-        self.admin_manager = admin_manager
-        super().__init__()
-
-    def populate_user_data(self) -> None:
-        self.user_data = {}
-        for username in self.__class__.query_users(self.__class__.user_class.level):
-            self.user_data[username] = self.__class__.user_class(
-                username,
-                self.admin_manager.user_data.get(username)
-            )
+    def prefetch_user_data(self, usernames:list[str]) -> None:
+        super().prefetch_user_data(usernames)
+
+        AdminManager.prefetch_admins(usernames)
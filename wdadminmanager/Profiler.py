@@ -0,0 +1,121 @@
+import csv
+import json
+import sys
+from contextlib import contextmanager
+from math import ceil
+from os.path import join
+from statistics import median
+from threading import Lock, local
+from typing import Any, Callable, Iterator, Optional
+
+
+# frames that are plumbing rather than the code that asked for the data
+SKIPPED_CALL_SITE_PREFIXES = [ 'Replica.', 'ApiClient.get', 'ApiClient._', 'Profiler.', 'FactCache.', 'GroupQuery._collect' ]
+
+
+class Profiler:  # opt-in per call site timing of replica queries and API requests
+    enabled:bool = False
+
+    _samples:dict[tuple[str, str, str], list[tuple[float, int, int]]] = {}  # (manager, kind, call site) -> [(seconds, rows, bytes)]
+    _lock = Lock()
+    _context = local()
+
+    @classmethod
+    def current_manager(cls) -> str:
+        return getattr(cls._context, 'manager', 'run')
+
+    @classmethod
+    @contextmanager
+    def manager(cls, name:str) -> Iterator[None]:
+        previous = cls.current_manager()
+        cls._context.manager = name
+        try:
+            yield
+        finally:
+            cls._context.manager = previous
+
+    @classmethod
+    def run_as(cls, name:str, function:Callable[..., Any], *args:Any) -> Any:  # for work handed to other threads
+        with cls.manager(name):
+            return function(*args)
+
+    @staticmethod
+    def call_site() -> str:
+        frame = sys._getframe(2)
+        while frame is not None:
+            qualname = frame.f_code.co_qualname
+            if '<lambda>' not in qualname and not any([ qualname.startswith(prefix) for prefix in SKIPPED_CALL_SITE_PREFIXES ]):
+                return qualname
+            frame = frame.f_back
+
+        return 'unknown'
+
+    @staticmethod
+    def size_of(rows:list[Any]) -> int:
+        size = 0
+        for row in rows:
+            values = row.values() if isinstance(row, dict) else row
+            for value in values:
+                size += len(value) if isinstance(value, (bytes, str)) else 8
+
+        return size
+
+    @classmethod
+    def record(cls, kind:str, seconds:float, rows:int, size:int, call_site:Optional[str]=None) -> None:
+        if call_site is None:
+            call_site = cls.call_site()
+
+        key = (cls.current_manager(), kind, call_site)
+        with cls._lock:
+            cls._samples.setdefault(key, []).append((seconds, rows, size))
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._samples.clear()
+
+    @classmethod
+    def get_report(cls) -> list[dict[str, Any]]:
+        with cls._lock:
+            samples = { key : list(values) for key, values in cls._samples.items() }
+
+        report = []
+        for (manager, kind, call_site), values in sorted(samples.items()):
+            latencies = sorted([ seconds for seconds, _, _ in values ])
+            report.append({
+                'manager' : manager,
+                'kind' : kind,
+                'call_site' : call_site,
+                'count' : len(values),
+                'total_seconds' : round(sum(latencies), 6),
+                'p50_seconds' : round(median(latencies), 6),
+                'p95_seconds' : round(latencies[max(0, ceil(0.95*len(latencies))-1)], 6),
+                'rows' : sum([ rows for _, rows, _ in values ]),
+                'bytes' : sum([ size for _, _, size in values ])
+            })
+
+        return report
+
+    @classmethod
+    def write(cls, directory:str) -> None:
+        report = cls.get_report()
+
+        with open(join(directory, 'profile.json'), mode='w', encoding='utf8') as file_handle:
+            json.dump(report, file_handle, indent=2)
+
+        with open(join(directory, 'profile.csv'), mode='w', encoding='utf8', newline='') as file_handle:
+            writer = csv.DictWriter(file_handle, fieldnames=[ 'manager', 'kind', 'call_site', 'count', 'total_seconds', 'p50_seconds', 'p95_seconds', 'rows', 'bytes' ])
+            writer.writeheader()
+            writer.writerows(report)
+
+    @classmethod
+    def print_summary(cls, limit:int=15) -> None:
+        report = sorted(cls.get_report(), key=lambda entry: entry['total_seconds'], reverse=True)
+
+        print(f'Profile: {sum([ entry["count"] for entry in report ])} calls, {sum([ entry["total_seconds"] for entry in report ]):.1f} s in total')
+        for entry in report[:limit]:
+            print(
+                f'  {entry["manager"]} {entry["kind"]} {entry["call_site"]}: {entry["count"]} calls,' \
+                f' {entry["total_seconds"]:.2f} s (p50 {entry["p50_seconds"]*1000:.0f} ms, p95 {entry["p95_seconds"]*1000:.0f} ms),' \
+                f' {entry["rows"]} rows, {entry["bytes"]} bytes'
+            )
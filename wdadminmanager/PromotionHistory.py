@@ -0,0 +1,181 @@
+from typing import Any, Optional
+
+import phpserialize
+
+from .FactCache import FactCache
+from .GroupQuery import GroupQuery
+from .Replica import Replica
+
+
+MAX_RENAME_CHAIN = 20  # guards against rename loops
+
+
+class PromotionHistory:  # resolves promotion timestamps without constructing User objects
+    system_accounts = [ 'Abuse filter', 'Maintenance script', 'MediaWiki default', 'MediaWiki message delivery' ]  # system accounts that do not have a promotion date
+
+    @staticmethod
+    def get_previous_username(username:str) -> Optional[str]:
+        return FactCache.get_or_compute(
+            'previous_username',
+            username,
+            lambda: PromotionHistory._query_previous_username(username)
+        )
+
+    @staticmethod
+    def _query_previous_username(username:str) -> Optional[str]:
+        username_underscore = username.replace(' ', '_')
+
+        query = f"""SELECT
+          log_params
+        FROM
+          logging
+        WHERE
+          log_type='gblrename'
+          AND log_action='rename'
+          AND log_title='CentralAuth/{username_underscore.replace("'", "''")}'"""
+
+        result = Replica.query(query, 'metawiki')
+        for dct in result:
+            rename = GroupQuery.parse_rename(dct.get('log_params', b''))
+            if rename is None:
+                continue
+
+            previous_username, current_username = rename
+            if current_username == username_underscore:
+                return previous_username
+
+        return None
+
+    @staticmethod
+    def preload_previous_usernames(usernames:list[str]) -> None:  # chunked queries for the current names; older names of a rename chain are queried when needed
+        missing_usernames = FactCache.missing('previous_username', usernames)
+        if len(missing_usernames) == 0:
+            return
+
+        FactCache.put_many('previous_username', GroupQuery.query_previous_usernames(missing_usernames))
+
+    @staticmethod
+    def get_rename_chain(username:str) -> list[str]:  # current username first, then all previous ones
+        return FactCache.get_or_compute(
+            'rename_chain',
+            username,
+            lambda: PromotionHistory._resolve_rename_chain(username)
+        )
+
+    @staticmethod
+    def _resolve_rename_chain(username:str) -> list[str]:
+        chain = [ username ]
+
+        while len(chain) < MAX_RENAME_CHAIN:
+            previous_username = PromotionHistory.get_previous_username(chain[-1])
+            if previous_username is None:
+                break
+
+            previous_username = previous_username.replace('_', ' ')
+            if previous_username in chain:
+                break
+
+            chain.append(previous_username)
+
+        return chain
+
+    @staticmethod
+    def preload_rights_changes(usernames:list[str]) -> None:  # a few chunked queries per database instead of two per user
+        for database in [ 'wikidatawiki', 'metawiki' ]:
+            fact = f'rights_changes/{database}'
+            missing_usernames = FactCache.missing(fact, usernames)
+            if len(missing_usernames) == 0:
+                continue
+
+            FactCache.put_many(fact, GroupQuery.query_rights_changes(missing_usernames, database))
+
+    @staticmethod
+    def get_rights_changes(username:str, database:str='wikidatawiki') -> list[dict[str, Any]]:
+        return FactCache.get_or_compute(
+            f'rights_changes/{database}',
+            username,
+            lambda: PromotionHistory._query_rights_changes(username, database)
+        )
+
+    @staticmethod
+    def _query_rights_changes(username:str, database:str) -> list[dict[str, Any]]:
+        username_underscore_escaped = username.replace(' ', '_').replace("'", "''")
+
+        if database=='wikidatawiki':
+            log_title = username_underscore_escaped
+        else:  # this is important since some logs are located in metawiki
+            log_title = f'{username_underscore_escaped}@wikidatawiki'
+
+        query = f"""SELECT
+          log_id,
+          log_timestamp,
+          log_params
+        FROM
+          logging
+        WHERE
+          log_type='rights'
+          AND log_title='{log_title}'"""
+
+        result = Replica.query(query, database)
+
+        return result
+
+    @staticmethod
+    def get_promotion_timestamps(username:str, levels:list[str]) -> list[int]:  # promotions of username and all its previous names to any of the levels
+        if username in PromotionHistory.system_accounts:
+            return []
+
+        return FactCache.get_or_compute(
+            '/'.join([ 'promotion_timestamps' ] + levels),
+            username,
+            lambda: PromotionHistory._resolve_promotion_timestamps(username, levels)
+        )
+
+    @staticmethod
+    def _resolve_promotion_timestamps(username:str, levels:list[str]) -> list[int]:
+        promotion_timestamps:list[int] = []
+
+        for chain_username in PromotionHistory.get_rename_chain(username):
+            try:
+                promotions_by_group = PromotionHistory.get_promotions_by_group(chain_username)
+            except RuntimeError as exception:
+                if chain_username == username:
+                    return []
+                continue
+
+            for level in levels:
+                promotion_timestamps += promotions_by_group.get(level, [])
+
+        return promotion_timestamps
+
+    @staticmethod
+    def get_promotions_by_group(username:str) -> dict[str, list[int]]:  # group -> promotion timestamps, from both databases
+        return FactCache.get_or_compute(
+            'promotions_by_group',
+            username,
+            lambda: PromotionHistory._index_promotions(
+                PromotionHistory.get_rights_changes(username) + PromotionHistory.get_rights_changes(username, 'metawiki')
+            )
+        )
+
+    @staticmethod
+    def _index_promotions(rights_changes:list[dict[str, Any]]) -> dict[str, list[int]]:
+        promotions_by_group:dict[str, list[int]] = {}
+
+        for dct in rights_changes:
+            timestamp = int(dct.get('log_timestamp', b'').decode('utf8'))
+            params = dct.get('log_params', '')
+
+            try:
+                params_loaded = phpserialize.loads(params)
+            except ValueError:
+                continue  # old log_params format; there are no such cases
+
+            if b'4::oldgroups' not in params_loaded or b'5::newgroups' not in params_loaded: # log_param is serialized php string with wrong format
+                continue
+
+            oldgroups = set(params_loaded[b'4::oldgroups'].values())
+            for group in set(params_loaded[b'5::newgroups'].values()) - oldgroups:
+                promotions_by_group.setdefault(group.decode('utf8'), []).append(timestamp)
+
+        return promotions_by_group
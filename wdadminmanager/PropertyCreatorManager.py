@@ -1,4 +1,4 @@
-from .UserManager import UserWithInactivityPolicy, UserManagerWithTimestamps
+from .UserManager import User, UserWithInactivityPolicy, UserManagerWithTimestamps
 
 
 # https://www.wikidata.org/wiki/Wikidata:Property_creators
@@ -7,13 +7,14 @@ INACTIVE_PROPERTY_CREATOR_ACTIONS = 1
 
 
 class PropertyCreator(UserWithInactivityPolicy):
+    __slots__ = ( 'property_creations', 'property_creations_warn' )
+
     level:str = 'propertycreator'
 
     def __init__(self, username:str, start_ts:int, warn_ts:int):
         super().__init__(username, start_ts, warn_ts)
 
-        self.property_creations = self.count_property_creations(self.start_ts)
-        self.property_creations_warn = self.count_property_creations(self.warn_ts)
+        self.property_creations, self.property_creations_warn = self.count_property_creations_windows([ self.start_ts, self.warn_ts ])
 
     @property
     def is_inactive(self) -> bool:
@@ -53,3 +54,8 @@ class PropertyCreatorManager(UserManagerWithTimestamps):
 
     def __init__(self):
         super().__init__(INACTIVE_PROPERTY_CREATOR_TIME)
+
+    def prefetch_user_data(self, usernames:list[str]) -> None:
+        super().prefetch_user_data(usernames)
+
+        User.prefetch_property_creations(usernames, [ self.start_ts, self.warn_ts ])
@@ -0,0 +1,70 @@
+from queue import Queue
+from threading import Thread
+from time import sleep
+from typing import Any, Callable, Optional, Type
+
+
+class Publisher:  # publishes rendered reports in the background; one worker thread and queue per sink
+    max_retries:int = 4
+    retry_delay:float = 15  # seconds before the first retry; doubled for each further one
+
+    def __init__(self, transient_errors:tuple[Type[BaseException], ...]=( OSError, )) -> None:
+        self.transient_errors = transient_errors
+        self.errors:list[tuple[str, str, BaseException]] = []  # (sink, page title, exception)
+
+        self._queues:list[Queue] = []
+        self._workers:list[Thread] = []
+
+    def __enter__(self) -> 'Publisher':
+        return self
+
+    def __exit__(self, exc_type:Optional[Type[BaseException]], exc_value:Optional[BaseException], traceback:Any) -> None:
+        self.close(raise_errors=exc_type is None)
+
+    def add_sink(self, sink:Callable[[str, str], None]) -> None:  # sink(page_title, body)
+        queue:Queue = Queue()
+        worker = Thread(target=self._work, args=(sink, queue), name=f'Publisher-{sink.__name__}', daemon=True)
+        worker.start()
+
+        self._queues.append(queue)
+        self._workers.append(worker)
+
+    def submit(self, page_title:str, body:str) -> None:
+        for queue in self._queues:
+            queue.put((page_title, body))
+
+    def close(self, raise_errors:bool=True) -> None:  # waits until everything submitted is published
+        for queue in self._queues:
+            queue.put(None)
+
+        for worker in self._workers:
+            worker.join()
+
+        self._queues = []
+        self._workers = []
+
+        if raise_errors and len(self.errors) > 0:
+            raise RuntimeError(f'Cannot publish {len(self.errors)} report(s)') from self.errors[0][2]
+
+    def _work(self, sink:Callable[[str, str], None], queue:Queue) -> None:
+        while True:
+            item = queue.get()
+            if item is None:
+                return
+
+            page_title, body = item
+            try:
+                self._publish(sink, page_title, body)
+            except Exception as exception:
+                print(f'Cannot publish {page_title} with {sink.__name__}: {exception}')
+                self.errors.append((sink.__name__, page_title, exception))
+
+    def _publish(self, sink:Callable[[str, str], None], page_title:str, body:str) -> None:
+        for attempt in range(self.max_retries+1):
+            try:
+                sink(page_title, body)
+                return
+            except self.transient_errors:
+                if attempt >= self.max_retries:
+                    raise
+                sleep(self.retry_delay * 2**attempt)
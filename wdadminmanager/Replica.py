@@ -1,33 +1,180 @@
 from os.path import expanduser
-from typing import Any
+from queue import Empty, LifoQueue
+from threading import BoundedSemaphore, Lock
+from time import perf_counter
+from typing import Any, Iterator
 
-import mariadb
+from .Profiler import Profiler
+
+try:
+    import mariadb
+except ImportError:  # only required for the live replicas; offline benchmarks plug in their own backend
+    mariadb = None
 
 
 class Replica:
-    def __init__(self, database:str) -> None:
-        self.replica = mariadb.connect(
+    backend:Any = mariadb  # module-like: connect() plus the DB-API exception classes of mariadb
+    max_connections:int = 4  # per database; Toolforge limits the number of concurrent replica connections per tool
+    reconnect_attempts:int = 2
+    connection_lost_errnos:set[int] = { 2002, 2003, 2006, 2013, 2055 }  # cannot connect, server has gone away, lost connection
+    stream_batch_size:int = 1000
+
+    _idle_connections:dict[str, LifoQueue] = {}
+    _connection_slots:dict[str, BoundedSemaphore] = {}
+    _pool_lock = Lock()
+
+    def __init__(self, database:str, dictionary:bool=True, buffered:bool=True) -> None:
+        self.database = database
+        self.replica = Replica.acquire(database)
+        try:
+            self.cursor = self.replica.cursor(dictionary=dictionary, buffered=buffered)
+        except Replica.connection_errors():
+            Replica.release(database, self.replica, healthy=False)
+            raise
+
+    def __enter__(self):
+        return self.cursor
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        healthy = not isinstance(exc_val, Replica.connection_errors())
+        try:
+            self.cursor.close()
+        except Replica.connection_errors():
+            healthy = False
+        Replica.release(self.database, self.replica, healthy)
+
+    @classmethod
+    def connection_errors(cls) -> tuple[type[Exception], ...]:
+        if cls.backend is None:  # nothing to catch; connect() reports the missing package
+            return ()
+
+        return (cls.backend.InterfaceError, cls.backend.OperationalError)
+
+    @classmethod
+    def is_connection_lost(cls, exception:Exception) -> bool:  # unlike e.g. a query killed for exceeding max_statement_time
+        return getattr(exception, 'errno', None) in cls.connection_lost_errnos
+
+    @classmethod
+    def connect(cls, database:str) -> Any:
+        if cls.backend is None:
+            raise RuntimeError('The mariadb package is required to query the replicas')
+
+        return cls.backend.connect(
             host=f'{database}.analytics.db.svc.wikimedia.cloud',
             database=f'{database}_p',
             default_file=f'{expanduser("~")}/replica.my.cnf'
         )
-        self.cursor = self.replica.cursor(dictionary=True)
 
-    def __enter__(self):
-        return self.cursor
+    @classmethod
+    def _get_pool(cls, database:str) -> tuple[LifoQueue, BoundedSemaphore]:
+        with cls._pool_lock:
+            if database not in cls._idle_connections:
+                cls._idle_connections[database] = LifoQueue()
+                cls._connection_slots[database] = BoundedSemaphore(cls.max_connections)
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        self.cursor.close()
-        self.replica.close()
+            return cls._idle_connections[database], cls._connection_slots[database]
+
+    @classmethod
+    def acquire(cls, database:str) -> Any:
+        idle_connections, connection_slots = cls._get_pool(database)
+        connection_slots.acquire()
+
+        try:
+            while True:
+                try:
+                    connection = idle_connections.get_nowait()
+                except Empty:
+                    return cls.connect(database)
+
+                try:  # health check for warm connections
+                    connection.ping()
+                except cls.connection_errors():
+                    cls._close_quietly(connection)
+                    continue
+
+                return connection
+        except BaseException:
+            connection_slots.release()
+            raise
+
+    @classmethod
+    def release(cls, database:str, connection:Any, healthy:bool=True) -> None:
+        idle_connections, connection_slots = cls._get_pool(database)
+
+        if healthy:
+            idle_connections.put(connection)
+        else:
+            cls._close_quietly(connection)
+
+        connection_slots.release()
+
+    @classmethod
+    def close_all(cls) -> None:
+        with cls._pool_lock:
+            idle_connections = list(cls._idle_connections.values())
+
+        for queue in idle_connections:
+            while True:
+                try:
+                    connection = queue.get_nowait()
+                except Empty:
+                    break
+                cls._close_quietly(connection)
+
+    @classmethod
+    def _close_quietly(cls, connection:Any) -> None:
+        try:
+            connection.close()
+        except cls.backend.Error:
+            pass
 
     @classmethod
     def query(cls, query:str, database:str='wikidatawiki') -> list[dict[str, Any]]:
-        with cls(database) as db_cursor:
+        t_start = perf_counter()
+
+        for attempt in range(cls.reconnect_attempts+1):
+            try:
+                with cls(database) as db_cursor:
+                    try:
+                        db_cursor.execute(query)
+                    except cls.backend.ProgrammingError as exception:
+                        raise RuntimeError(f'Cannot query {query}') from exception
+
+                    result = db_cursor.fetchall()
+            except cls.connection_errors() as exception:  # stale or dropped connection; retry with a fresh one
+                if attempt == cls.reconnect_attempts or not cls.is_connection_lost(exception):
+                    raise
+                continue
+
+            if Profiler.enabled:
+                Profiler.record(f'replica/{database}', perf_counter()-t_start, len(result), Profiler.size_of(result))
+
+            return result
+
+    @classmethod
+    def stream(cls, query:str, database:str='wikidatawiki', dictionary:bool=True) -> Iterator[Any]:
+        # unbuffered cursor: rows are fetched in batches while iterating, and the connection stays
+        # checked out until the iterator is exhausted; do not query from within the loop
+        t_start = perf_counter()
+        rows = 0
+        size = 0
+
+        with cls(database, dictionary=dictionary, buffered=False) as db_cursor:
             try:
                 db_cursor.execute(query)
-            except mariadb.ProgrammingError as exception:
+            except cls.backend.ProgrammingError as exception:
                 raise RuntimeError(f'Cannot query {query}') from exception
 
-            result = db_cursor.fetchall()
+            while True:
+                batch = db_cursor.fetchmany(cls.stream_batch_size)
+                if len(batch) == 0:
+                    break
+
+                rows += len(batch)
+                if Profiler.enabled:
+                    size += Profiler.size_of(batch)
+
+                yield from batch
 
-        return result
+        if Profiler.enabled:
+            Profiler.record(f'replica/{database}', perf_counter()-t_start, rows, size)
@@ -0,0 +1,43 @@
+from os.path import join
+from string import Formatter
+from threading import Lock
+from typing import Any, Optional, TextIO
+
+
+TEMPLATE_DIRECTORY = './templates'
+
+
+class ReportTemplate:  # a report template, read and split into literal text and replacement fields once per process
+    _templates:dict[str, 'ReportTemplate'] = {}
+    _lock = Lock()
+
+    def __init__(self, text:str) -> None:
+        self.segments:list[tuple[str, Optional[str], str]] = [
+            (literal_text, field_name, format_spec or '') for literal_text, field_name, format_spec, _ in Formatter().parse(text)
+        ]
+
+    @classmethod
+    def get(cls, name:str) -> 'ReportTemplate':
+        with cls._lock:
+            if name not in cls._templates:
+                with open(join(TEMPLATE_DIRECTORY, name), mode='r', encoding='utf8') as file_handle:
+                    cls._templates[name] = cls(file_handle.read())
+
+            return cls._templates[name]
+
+    @classmethod
+    def preload(cls, names:list[str]) -> None:
+        for name in names:
+            cls.get(name)
+
+    def render(self, sink:TextIO, fields:dict[str, Any]) -> None:
+        for literal_text, field_name, format_spec in self.segments:
+            sink.write(literal_text)
+            if field_name is None:
+                continue
+
+            value = fields[field_name]
+            if callable(value):  # writes itself to the sink, e.g. the table rows
+                value(sink)
+            else:
+                sink.write(format(value, format_spec))
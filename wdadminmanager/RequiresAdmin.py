@@ -1,22 +1,25 @@
-from typing import Optional
-
-from .UserManager import User
-from .AdminManager import Admin
+from .GroupMembership import GroupMembership
+from .AdminManager import Admin, AdminManager
 
 class RequiresAdmin:
-    def __init__(self, admin:Optional[User]) -> None:
-        self.admin = admin
+    # the mixin cannot hold slots itself; user classes add admin_slots to their own __slots__
+    __slots__ = ()
+    admin_slots:tuple[str, ...] = ( 'admin_membership', 'admin_inactivity', 'admin_inacticity_warn' )
+
+    def __init__(self, username:str) -> None:
+        self.admin_membership = GroupMembership.is_member(username, Admin.level)
 
-        if isinstance(self.admin, Admin):
-            self.admin_inactivity = self.admin.is_inactive
-            self.admin_inacticity_warn = self.admin.is_slipping_into_inactivity
+        admin = AdminManager.make_admin(username)  # not kept, so that it is released along with this record
+        if admin is not None:
+            self.admin_inactivity = admin.is_inactive
+            self.admin_inacticity_warn = admin.is_slipping_into_inactivity
         else:
             self.admin_inactivity = True
             self.admin_inacticity_warn = True
 
     @property
     def is_admin(self) -> bool:
-        return isinstance(self.admin, Admin)
+        return self.admin_membership
 
     @property
     def is_inactive_admin(self) -> bool:
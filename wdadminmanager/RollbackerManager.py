@@ -5,6 +5,8 @@ from .UserManager import UserWithoutInactivityPolicy, UserManager
 
 
 class Rollbacker(UserWithoutInactivityPolicy):
+    __slots__ = ()
+
     level:str = 'rollbacker'
 
 
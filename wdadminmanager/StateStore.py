@@ -0,0 +1,217 @@
+import json
+import sqlite3
+from base64 import b64decode, b64encode
+from threading import Lock
+from time import gmtime, strftime
+from typing import Any, Optional
+
+import phpserialize
+
+from .FactCache import FactCache
+from .Replica import Replica
+
+
+STATE_FILE = './logs/state.sqlite3'
+WATERMARK_OVERLAP = 86400  # seconds; re-read this much history on each run to tolerate replication lag
+
+
+class StateStore:  # persists per-user facts between runs for incremental mode
+    incremental:bool = False
+    watermark:Optional[int] = None  # MediaWiki timestamp up to which the stored facts are complete
+    persistent_facts:list[str] = [
+        'last_edit_activity',
+        'last_logged_activity',
+        'previous_username',
+        'rights_changes/wikidatawiki',
+        'rights_changes/metawiki'
+    ]
+
+    _connection:Optional[sqlite3.Connection] = None
+    _lock = Lock()
+
+    @classmethod
+    def open(cls, path:str=STATE_FILE, incremental:bool=True) -> None:
+        cls._connection = sqlite3.connect(path, check_same_thread=False)
+        cls._connection.executescript("""CREATE TABLE IF NOT EXISTS facts (
+          fact TEXT NOT NULL,
+          username TEXT NOT NULL,
+          value TEXT NOT NULL,
+          PRIMARY KEY (fact, username)
+        );
+        CREATE TABLE IF NOT EXISTS watermarks (
+          name TEXT PRIMARY KEY,
+          value INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS published (
+          page_title TEXT PRIMARY KEY,
+          content_hash TEXT NOT NULL,
+          timestamp INTEGER NOT NULL
+        );""")
+
+        cls.watermark = cls.get_watermark('facts')
+        cls.incremental = incremental and cls.watermark is not None
+
+        if cls.incremental:
+            cls._load_previous_usernames()
+            cls._load_rights_changes('wikidatawiki')
+            cls._load_rights_changes('metawiki')
+
+    @classmethod
+    def close(cls) -> None:
+        with cls._lock:
+            if cls._connection is not None:
+                cls._connection.close()
+            cls._connection = None
+
+        cls.incremental = False
+        cls.watermark = None
+
+    @classmethod
+    def is_incremental(cls) -> bool:
+        return cls._connection is not None and cls.incremental
+
+    @classmethod
+    def get_watermark(cls, name:str) -> Optional[int]:
+        with cls._lock:
+            row = cls._connection.execute('SELECT value FROM watermarks WHERE name=?', (name, )).fetchone()
+
+        if row is None:
+            return None
+
+        return row[0]
+
+    @classmethod
+    def load_facts(cls, fact:str, usernames:Optional[list[str]]=None) -> dict[str, Any]:
+        with cls._lock:
+            rows = cls._connection.execute('SELECT username, value FROM facts WHERE fact=?', (fact, )).fetchall()
+
+        if usernames is None:
+            return { username : cls._decode(value) for username, value in rows }
+
+        wanted = set(usernames)
+        return { username : cls._decode(value) for username, value in rows if username in wanted }
+
+    @classmethod
+    def save(cls, t_start:float, advance_watermark:bool=True) -> None:  # keep the watermark if only some groups were updated
+        if cls._connection is None:
+            return
+
+        watermark = int(strftime('%Y%m%d%H%M%S', gmtime(t_start - WATERMARK_OVERLAP)))
+
+        with cls._lock:
+            with cls._connection:
+                for fact in cls.persistent_facts:
+                    cls._connection.executemany(
+                        'INSERT OR REPLACE INTO facts (fact, username, value) VALUES (?, ?, ?)',
+                        [ (fact, username, cls._encode(value)) for username, value in FactCache.get_values(fact).items() ]
+                    )
+                if advance_watermark:
+                    cls._connection.execute('INSERT OR REPLACE INTO watermarks (name, value) VALUES (?, ?)', ('facts', watermark))
+
+    @classmethod
+    def get_published(cls, page_title:str) -> Optional[tuple[str, int]]:  # content hash and unix time of the last save of a report page
+        if cls._connection is None:
+            return None
+
+        with cls._lock:
+            row = cls._connection.execute('SELECT content_hash, timestamp FROM published WHERE page_title=?', (page_title, )).fetchone()
+
+        if row is None:
+            return None
+
+        return row[0], row[1]
+
+    @classmethod
+    def set_published(cls, page_title:str, content_hash:str, timestamp:int) -> None:  # committed right away, the edit has been made
+        if cls._connection is None:
+            return
+
+        with cls._lock:
+            with cls._connection:
+                cls._connection.execute(
+                    'INSERT OR REPLACE INTO published (page_title, content_hash, timestamp) VALUES (?, ?, ?)',
+                    (page_title, content_hash, timestamp)
+                )
+
+    @staticmethod
+    def _encode(value:Any) -> str:
+        def encode_bytes(obj:Any) -> Any:
+            if isinstance(obj, bytes):
+                return { '__bytes__' : b64encode(obj).decode('ascii') }
+            raise TypeError(f'Cannot serialize {type(obj)}')
+
+        return json.dumps(value, default=encode_bytes)
+
+    @staticmethod
+    def _decode(value:str) -> Any:
+        def decode_bytes(obj:dict[str, Any]) -> Any:
+            if list(obj.keys()) == [ '__bytes__' ]:
+                return b64decode(obj['__bytes__'])
+            return obj
+
+        return json.loads(value, object_hook=decode_bytes)
+
+    @classmethod
+    def _load_previous_usernames(cls) -> None:  # renames are rare; read all of them since the watermark
+        previous_usernames = cls.load_facts('previous_username')
+
+        query = f"""SELECT
+          log_params
+        FROM
+          logging
+        WHERE
+          log_type='gblrename'
+          AND log_action='rename'
+          AND log_timestamp>={cls.watermark}"""
+
+        for dct in Replica.query(query, 'metawiki'):
+            try:
+                params = phpserialize.loads(dct.get('log_params', ''))
+            except ValueError:
+                continue
+
+            if b'4::olduser' not in params or b'5::newuser' not in params:
+                continue
+
+            current_username = params[b'5::newuser'].decode('utf8').replace('_', ' ')
+            if current_username not in previous_usernames:  # users without stored rows are queried when needed
+                continue
+
+            previous_usernames[current_username] = params[b'4::olduser'].decode('utf8')
+
+        FactCache.put_many('previous_username', previous_usernames, fetched=False)
+
+    @classmethod
+    def _load_rights_changes(cls, database:str) -> None:  # rights changes are rare; read all of them since the watermark
+        fact = f'rights_changes/{database}'
+        rights_changes = cls.load_facts(fact)
+
+        query = f"""SELECT
+          log_id,
+          log_title,
+          log_timestamp,
+          log_params
+        FROM
+          logging
+        WHERE
+          log_type='rights'
+          AND log_timestamp>={cls.watermark}"""
+
+        for dct in Replica.query(query, database):
+            log_title = dct.get('log_title', b'').decode('utf8')
+            if database != 'wikidatawiki':
+                if not log_title.endswith('@wikidatawiki'):
+                    continue
+                log_title = log_title[:-len('@wikidatawiki')]
+
+            username = log_title.replace('_', ' ')
+            if username not in rights_changes:  # users without stored rows are queried in full when needed
+                continue
+
+            known_log_ids = [ row.get('log_id') for row in rights_changes[username] ]
+            if dct.get('log_id') in known_log_ids:
+                continue
+
+            rights_changes[username].append({ key : dct.get(key) for key in [ 'log_id', 'log_timestamp', 'log_params' ] })
+
+        FactCache.put_many(fact, rights_changes, fetched=False)
@@ -1,4 +1,4 @@
-from .UserManager import UserWithInactivityPolicy, UserManagerWithTimestamps
+from .UserManager import User, UserWithInactivityPolicy, UserManagerWithTimestamps
 
 
 # https://www.wikidata.org/wiki/Wikidata:Translation_administrators
@@ -7,6 +7,8 @@ INACTIVE_TRANSLATIONADMIN_ACTIONS = 1
 
 
 class TranslationAdmin(UserWithInactivityPolicy):
+    __slots__ = ( 'translationadmin_actions', 'translationadmin_actions_warn' )
+
     level:str = 'translationadmin'
     log_types:list[str] = [ # https://www.wikidata.org/wiki/Special:ListGroupRights
         'pagelang',
@@ -16,8 +18,10 @@ class TranslationAdmin(UserWithInactivityPolicy):
     def __init__(self, username:str, start_ts:int, warn_ts:int) -> None:
         super().__init__(username, start_ts, warn_ts)
 
-        self.translationadmin_actions = self.count_logged_actions(self.start_ts, TranslationAdmin.log_types)
-        self.translationadmin_actions_warn = self.count_logged_actions(self.warn_ts, TranslationAdmin.log_types)
+        self.translationadmin_actions, self.translationadmin_actions_warn = self.count_logged_actions_windows(
+            [ self.start_ts, self.warn_ts ],
+            TranslationAdmin.log_types
+        )
 
     @property
     def is_inactive(self) -> bool:
@@ -57,3 +61,8 @@ class TranslationAdminManager(UserManagerWithTimestamps):
 
     def __init__(self):
         super().__init__(INACTIVE_TRANSLATIONADMIN_TIME)
+
+    def prefetch_user_data(self, usernames:list[str]) -> None:
+        super().prefetch_user_data(usernames)
+
+        User.prefetch_logged_actions(usernames, [ self.start_ts, self.warn_ts ], TranslationAdmin.log_types)
@@ -1,17 +1,40 @@
+import sys
 from abc import abstractmethod
-from datetime import datetime
-from time import gmtime, strftime
-from typing import Any, Optional, Type, ValuesView
-
-import phpserialize
-import requests
-
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from threading import Lock
+from time import gmtime, localtime, strftime, struct_time
+from typing import Any, Callable, Iterator, Optional, TextIO, Type
+
+from .ApiClient import ApiClient
+from .EventTable import EventTable
+from .FactCache import FactCache
+from .GroupMembership import GroupMembership
+from .GroupQuery import GroupQuery
+from .Profiler import Profiler
+from .PromotionHistory import PromotionHistory
 from .Replica import Replica
+from .ReportTemplate import ReportTemplate
+from .StateStore import StateStore
+from .WikiScan import WikiScan
+
 
+class User:  # instances only hold the facts in __slots__; queries live in GroupQuery, PromotionHistory and the backends, cached by FactCache
+    __slots__ = ( 'username', 'last_edit_activity', 'last_logged_activity', 'editcount' )
 
-class User:
     level:str
     former_levels:list[str] = []
+    last_logged_activity_backend:str = 'api'  # key of last_logged_activity_backends
+    last_logged_activity_backends:dict[str, Callable[..., dict[str, int]]] = {
+        'api' : ApiClient.query_last_logged_activities,
+        'replica' : GroupQuery.query_last_logged_activity
+    }
+    window_count_backend:str = 'scan'  # key of window_count_backends
+    window_count_backends:dict[str, Any] = {
+        'replica' : GroupQuery,  # one conditional aggregation per metric and batch of users
+        'scan' : WikiScan,  # as replica, but rare revision types are read wiki-wide once per window
+        'events' : EventTable  # per-event rows aggregated with numpy
+    }
 
     def __init__(self, username:str) -> None:
         self.username = username
@@ -31,6 +54,105 @@ class User:
     def username_escaped(self) -> str:
         return self.username.replace("'", "''")
 
+    @staticmethod
+    def fact_key(fact:str, *args:Any) -> str:
+        return '/'.join([ fact ] + [ str(arg) for arg in args ])
+
+    @staticmethod
+    def prefetch(fact_key:str, usernames:list[str], query:Callable[..., dict[str, Any]], *args:Any) -> None:
+        missing_usernames = FactCache.missing(fact_key, usernames)  # members of several groups are fetched only once
+        if len(missing_usernames) == 0:
+            return
+
+        FactCache.put_many(fact_key, query(missing_usernames, *args))
+
+    @staticmethod
+    def prefetch_latest_timestamp(fact_key:str, usernames:list[str], query:Callable[..., dict[str, int]]) -> None:
+        missing_usernames = FactCache.missing(fact_key, usernames)
+        if len(missing_usernames) == 0:
+            return
+
+        if StateStore.is_incremental():  # only look for activity since the previous run
+            stored = StateStore.load_facts(fact_key, missing_usernames)
+            if len(stored) > 0:
+                delta = query(list(stored.keys()), since=StateStore.watermark)
+                FactCache.put_many(fact_key, { username : max(timestamp, delta.get(username, 0)) for username, timestamp in stored.items() })
+                missing_usernames = [ username for username in missing_usernames if username not in stored ]
+
+        if len(missing_usernames) == 0:
+            return
+
+        FactCache.put_many(fact_key, query(missing_usernames))
+
+    @staticmethod
+    def get_last_logged_activity_backend() -> Callable[..., dict[str, int]]:
+        backend = User.last_logged_activity_backends.get(User.last_logged_activity_backend)
+        if backend is None:
+            raise ValueError(f'Unknown last logged activity backend "{User.last_logged_activity_backend}"')
+
+        return backend
+
+    @staticmethod
+    def get_window_count_backend() -> Any:
+        backend = User.window_count_backends.get(User.window_count_backend)
+        if backend is None:
+            raise ValueError(f'Unknown window count backend "{User.window_count_backend}"')
+
+        return backend
+
+    @classmethod
+    def prefetch_user_data(cls, usernames:list[str]) -> None:
+        User.prefetch_latest_timestamp(User.fact_key('last_edit_activity'), usernames, GroupQuery.query_last_edit_activity)
+        User.prefetch(User.fact_key('editcount'), usernames, GroupQuery.query_editcount)
+        User.prefetch_latest_timestamp(User.fact_key('last_logged_activity'), usernames, User.get_last_logged_activity_backend())
+
+    @staticmethod
+    def prefetch_windows(fact_keys:list[str], usernames:list[str], query:Callable[..., dict[str, list[int]]], *args:Any) -> None:
+        missing_usernames = sorted(set().union(*[ FactCache.missing(fact_key, usernames) for fact_key in fact_keys ]))
+        if len(missing_usernames) == 0:
+            return
+
+        counts = query(missing_usernames, *args)
+        for index, fact_key in enumerate(fact_keys):
+            FactCache.put_many(fact_key, { username : user_counts[index] for username, user_counts in counts.items() })
+
+    @staticmethod
+    def prefetch_logged_actions(usernames:list[str], thresholds:list[int], log_types:list[str]) -> None:
+        User.prefetch_windows(
+            [ User.fact_key('logged_actions', threshold, *log_types) for threshold in thresholds ],
+            usernames,
+            User.get_window_count_backend().count_logged_actions_windows,
+            thresholds,
+            log_types
+        )
+
+    @staticmethod
+    def prefetch_property_creations(usernames:list[str], thresholds:list[int]) -> None:
+        User.prefetch_windows(
+            [ User.fact_key('property_creations', threshold) for threshold in thresholds ],
+            usernames,
+            User.get_window_count_backend().count_property_creations_windows,
+            thresholds
+        )
+
+    @staticmethod
+    def prefetch_mediawiki_namespace_edits(usernames:list[str], thresholds:list[int]) -> None:
+        User.prefetch_windows(
+            [ User.fact_key('mediawiki_namespace_edits', threshold) for threshold in thresholds ],
+            usernames,
+            User.get_window_count_backend().count_mediawiki_namespace_edits_windows,
+            thresholds
+        )
+
+    @staticmethod
+    def prefetch_jscss_edits(usernames:list[str], thresholds:list[int]) -> None:
+        User.prefetch_windows(
+            [ User.fact_key('jscss_edits', threshold) for threshold in thresholds ],
+            usernames,
+            User.get_window_count_backend().count_jscss_edits_windows,
+            thresholds
+        )
+
     @property
     def last_edit_date(self) -> str:
         if self.last_edit_activity == 0:
@@ -44,193 +166,59 @@ class User:
         return max(self.last_edit_activity, self.last_logged_activity)
 
     def get_previous_username(self) -> Optional[str]:
-        query = f"""SELECT
-          log_params
-        FROM
-          logging
-        WHERE
-          log_type='gblrename'
-          AND log_action='rename'
-          AND log_title='CentralAuth/{self.username_underscore_escaped}'"""
-
-        result = Replica.query(query, 'metawiki')
-        for dct in result:
-            try:
-                params = phpserialize.loads(dct.get('log_params', ''))
-            except ValueError as exception:  # old log_params format, to be ignored
-                continue
-
-            previous_username = params[b'4::olduser'].decode('utf8')
-            current_username = params[b'5::newuser'].decode('utf8')
-            
-            if current_username == self.username_underscore:
-                return previous_username
-
-        return None
+        return PromotionHistory.get_previous_username(self.username)
 
     def query_editcount(self) -> None:
-        query = f"""SELECT
-          user_editcount
-        FROM
-          user
-        WHERE
-          user_name='{self.username_escaped}'"""
-
-        result = Replica.query(query)
+        self.editcount = FactCache.get_or_compute(
+            User.fact_key('editcount'),
+            self.username,
+            lambda: GroupQuery.query_editcount([ self.username ])[self.username]
+        )
 
-        if len(result) == 0:
-            self.editcount = 0
-        else:
-            self.editcount = result[0].get('user_editcount', 0)
-
-    def count_logged_actions(self, earliest_timestamp:int, log_types:list[str]) -> int:
-        log_types_concatenated = "', '".join(log_types)
-
-        query = f"""SELECT
-          COUNT(log_id) AS cnt
-        FROM
-          logging_userindex
-            JOIN actor_logging ON log_actor=actor_id
-        WHERE
-          actor_name='{self.username_escaped}'
-          AND log_timestamp>={earliest_timestamp}
-          AND log_type IN ('{log_types_concatenated}')"""
-
-        result = Replica.query(query)
-
-        return result[0].get('cnt', 0)
-
-    def count_property_creations(self, earliest_timestamp:int) -> int:
-        query = f"""SELECT
-          COUNT(*) AS cnt
-        FROM
-          page
-            JOIN revision_userindex ON page_id=rev_page
-            JOIN actor_revision ON rev_actor=actor_id
-        WHERE
-          rev_parent_id=0
-          AND rev_timestamp>={earliest_timestamp}
-          AND page_namespace=120
-          AND actor_name='{self.username_escaped}'"""
-
-        result = Replica.query(query)
-
-        return result[0].get('cnt', 0)
-
-    def get_rights_actions(self, earliest_timestamp:int) -> list[dict[str, Any]]:
-        query = f"""SELECT
-          log_params
-        FROM
-          logging_userindex
-            JOIN actor_logging ON log_actor=actor_id
-        WHERE
-          actor_name='{self.username_escaped}'
-          AND log_timestamp>={earliest_timestamp}
-          AND log_type='rights'"""
-
-        result = Replica.query(query)
-
-        return result
-
-    def count_mediawiki_namespace_edits(self, earliest_timestamp:int) -> int:
-        query = f"""SELECT
-          COUNT(rev_id) AS cnt
-        FROM
-          revision_userindex
-            JOIN actor_revision ON rev_actor=actor_id
-            JOIN page ON rev_page=page_id
-        WHERE
-          actor_name='{self.username_escaped}'
-          AND rev_timestamp>={earliest_timestamp}
-          AND page_namespace=8
-          AND page_content_model NOT IN ('css', 'sanitized-css', 'javascript', 'json')"""
-
-        result = Replica.query(query)
-
-        return result[0].get('cnt', 0)
-
-    def count_jscss_edits(self, earliest_timestamp:int) -> int:
-        edit_count = 0
-        
-        for dct in self._query_jscss_edits(earliest_timestamp):
-            page_title = dct.get('page_title', b'').decode('utf8')
-            page_namespace = dct.get('page_namespace', 0)
-            #page_content_model = dct.get('page_content_model', '')
-
-            if page_namespace in [ 2, 3 ] and page_title.startswith(self.username_underscore):
-                continue
-
-            edit_count += 1
-        
-        return edit_count
-
-    def _query_jscss_edits(self, earliest_timestamp:int) -> list[dict[str, Any]]:
-        query = f"""SELECT
-          page_title,
-          page_namespace,
-          page_content_model
-        FROM
-          revision_userindex
-            JOIN actor_revision ON rev_actor=actor_id
-            JOIN page ON rev_page=page_id
-        WHERE
-          actor_name='{self.username_escaped}'
-          AND rev_timestamp>={earliest_timestamp}
-          AND page_content_model IN ('css', 'sanitized-css', 'javascript', 'json')"""
-
-        result = Replica.query(query)
-
-        return result
+    def count_logged_actions_windows(self, thresholds:list[int], log_types:list[str]) -> list[int]:
+        return FactCache.get_or_compute_many(
+            [ User.fact_key('logged_actions', threshold, *log_types) for threshold in thresholds ],
+            self.username,
+            lambda: User.get_window_count_backend().count_logged_actions_windows([ self.username ], thresholds, log_types)[self.username]
+        )
 
-    def query_last_logged_activity(self) -> None:
-        response = requests.get(
-            url='https://www.wikidata.org/w/api.php',
-            params={
-                'action' : 'query',
-                'format' : 'json',
-                'list' : 'logevents',
-                'leprop' : 'timestamp',
-                'leuser' : f'{self.username}',
-                'lelimit' : '1'
-            },
-            headers={
-                'User-Agent' : f'{requests.utils.default_headers()["User-Agent"]} (Wikidata bot' \
-                                ' by User:MisterSynergy; mailto:mister.synergy@yahoo.com)'
-            }
+    def count_property_creations_windows(self, thresholds:list[int]) -> list[int]:
+        return FactCache.get_or_compute_many(
+            [ User.fact_key('property_creations', threshold) for threshold in thresholds ],
+            self.username,
+            lambda: User.get_window_count_backend().count_property_creations_windows([ self.username ], thresholds)[self.username]
         )
-        payload = response.json()
 
-        logevents = payload.get('query', {}).get('logevents', [])
-        if len(logevents) == 0:
-            self.last_logged_activity = 0
-            return
+    def get_rights_actions(self, earliest_timestamp:int) -> Iterator[tuple[bytes]]:
+        return GroupQuery.stream_rights_actions(self.username, earliest_timestamp)
 
-        timestamp_str = logevents[0].get('timestamp', '')
-        if timestamp_str == '':
-            self.last_logged_activity = 0
-            return
+    def count_mediawiki_namespace_edits_windows(self, thresholds:list[int]) -> list[int]:
+        return FactCache.get_or_compute_many(
+            [ User.fact_key('mediawiki_namespace_edits', threshold) for threshold in thresholds ],
+            self.username,
+            lambda: User.get_window_count_backend().count_mediawiki_namespace_edits_windows([ self.username ], thresholds)[self.username]
+        )
 
-        self.last_logged_activity = int(datetime.strptime(timestamp_str, '%Y-%m-%dT%H:%M:%SZ').strftime('%Y%m%d%H%M%S'))
+    def count_jscss_edits_windows(self, thresholds:list[int]) -> list[int]:
+        return FactCache.get_or_compute_many(
+            [ User.fact_key('jscss_edits', threshold) for threshold in thresholds ],
+            self.username,
+            lambda: User.get_window_count_backend().count_jscss_edits_windows([ self.username ], thresholds)[self.username]
+        )
+
+    def query_last_logged_activity(self) -> None:
+        self.last_logged_activity = FactCache.get_or_compute(
+            User.fact_key('last_logged_activity'),
+            self.username,
+            lambda: User.get_last_logged_activity_backend()([ self.username ]).get(self.username, 0)
+        )
 
     def query_last_edit_activity(self) -> None:
-        query = f"""SELECT 
-          rev_timestamp
-        FROM
-          revision_userindex
-            JOIN actor_revision ON rev_actor=actor_id
-        WHERE
-          actor_name='{self.username_escaped}'
-        ORDER BY
-          rev_timestamp DESC
-        LIMIT
-          1"""
-
-        result = Replica.query(query)
-
-        if len(result) == 0:
-            self.last_edit_activity = 0
-        else:
-            self.last_edit_activity = int(result[0].get('rev_timestamp', 0))
+        self.last_edit_activity = FactCache.get_or_compute(
+            User.fact_key('last_edit_activity'),
+            self.username,
+            lambda: GroupQuery.query_last_edit_activity([ self.username ])[self.username]
+        )
 
     def report_table_row(self) -> str:
         report_table_wikitext_rows = [ '|-' ]
@@ -242,14 +230,20 @@ class User:
 
 
 class UserWithElevatedRights(User):
-    system_accounts = [ 'Abuse filter', 'Maintenance script', 'MediaWiki default', 'MediaWiki message delivery' ]  # system accounts that do not have a promotion date
+    __slots__ = ( 'promotion_timestamps', )
+
+    system_accounts = PromotionHistory.system_accounts
     
-    def __init__(self, username:str, level:Optional[str]=None) -> None:
+    def __init__(self, username:str) -> None:
         super().__init__(username)
-        if level is not None:  # optionally overwrite the class attribute with an instance attribute
-            self.level = level
         self.init_promotion_timestamps()
 
+    @classmethod
+    def prefetch_user_data(cls, usernames:list[str]) -> None:
+        super().prefetch_user_data(usernames)
+        PromotionHistory.preload_previous_usernames(usernames)
+        PromotionHistory.preload_rights_changes(usernames)
+
     @property
     def latest_promotion_timestamp(self) -> Optional[int]:
         if len(self.promotion_timestamps) == 0:
@@ -266,67 +260,10 @@ class UserWithElevatedRights(User):
         return f'{s[0:4]}-{s[4:6]}-{s[6:8]}'
 
     def init_promotion_timestamps(self) -> None:
-        self.promotion_timestamps:list[int] = []
-
-        if self.username in self.system_accounts:
-            return
-
-        bytes_level = bytes(self.level, 'utf8')
-
-        try:
-            rights_changes_wikidata = self._query_rights_changes()
-            rights_changes_metawiki = self._query_rights_changes('metawiki')
-        except RuntimeError as exception:
-            return
-
-        for dct in rights_changes_wikidata + rights_changes_metawiki:
-            timestamp = int(dct.get('log_timestamp', b'').decode('utf8'))
-            params = dct.get('log_params', '')
-
-            try:
-                params_loaded = phpserialize.loads(params)
-            except ValueError:
-                continue  # old log_params format; there are no such cases
-
-            if b'4::oldgroups' not in params_loaded or b'5::newgroups' not in params_loaded: # log_param is serialized php string with wrong format
-                continue
-
-            if bytes_level not in params_loaded[b'4::oldgroups'].values() and bytes_level in params_loaded[b'5::newgroups'].values():
-                self.promotion_timestamps.append(timestamp)
-
-        if len(self.former_levels) > 0:
-            for former_level in self.former_levels:
-                previous_level_user = UserWithElevatedRights(self.username, level=former_level)
-                self.promotion_timestamps += previous_level_user.promotion_timestamps
-
-        previous_username = self.get_previous_username()
-        if previous_username is not None:
-            previous_user = UserWithElevatedRights(previous_username, level=self.level)
-            self.promotion_timestamps += previous_user.promotion_timestamps
-
-            if len(self.former_levels) > 0:
-                for former_level in self.former_levels:
-                    previous_level_user = UserWithElevatedRights(previous_username, level=former_level)
-                    self.promotion_timestamps += previous_level_user.promotion_timestamps
-
-    def _query_rights_changes(self, database:str='wikidatawiki') -> list[dict[str, Any]]:
-        if database=='wikidatawiki':
-            log_title = self.username_underscore_escaped
-        else:  # this is important since some logs are located in metawiki
-            log_title = f'{self.username_underscore_escaped}@wikidatawiki'
-
-        query = f"""SELECT
-          log_timestamp,
-          log_params
-        FROM
-          logging
-        WHERE
-          log_type='rights'
-          AND log_title='{log_title}'"""
-
-        result = Replica.query(query, database)
-
-        return result
+        self.promotion_timestamps:list[int] = PromotionHistory.get_promotion_timestamps(
+            self.username,
+            [ self.level ] + self.former_levels
+        )
 
     def report_table_row(self) -> str:
         report_table_wikitext_rows = [ '|-' ]
@@ -339,6 +276,8 @@ class UserWithElevatedRights(User):
 
 
 class UserWithInactivityPolicy(UserWithElevatedRights):
+    __slots__ = ( 'start_ts', 'warn_ts' )
+
     def __init__(self, username:str, start_ts:int, warn_ts:int) -> None:
         super().__init__(username)
 
@@ -378,6 +317,8 @@ class UserWithInactivityPolicy(UserWithElevatedRights):
 
 
 class UserWithoutInactivityPolicy(UserWithElevatedRights):
+    __slots__ = ()
+
     def report_table_row(self) -> str:
         report_table_wikitext_rows = [ '|-' ]
 
@@ -394,79 +335,115 @@ class UserManager:
     user_class:Type[User]
     report_template:str
     report_subpage:str
+    max_user_workers:int = 1  # members constructed concurrently; their queries share the Replica connection pool
 
     def __init__(self) -> None:
-        self.populate_user_data()
-        self.make_user_table(
-            self.__class__.report_column_headers,
-            self.user_data.values()
-        )
+        with Profiler.manager(self.__class__.__name__):
+            self.populate_user_data()
 
     @staticmethod
     def query_users(group:str) -> list[str]:
-        query = f"""SELECT
-          user_name
-        FROM
-          user
-            LEFT JOIN user_groups ON user_id=ug_user
-        WHERE
-          ug_group='{group}'
-        ORDER BY
-          user_name ASC"""
+        return GroupMembership.get_members(group)
 
-        result = Replica.query(query)
+    def populate_user_data(self) -> None:
+        usernames = self.__class__.query_users(self.__class__.user_class.level)
+        self.prefetch_user_data(usernames)
 
-        return [ row.get('user_name', b'').decode('utf8') for row in result ]
+        if self.__class__.max_user_workers > 1:
+            manager = Profiler.current_manager()
+            with ThreadPoolExecutor(max_workers=self.__class__.max_user_workers) as executor:
+                users = list(executor.map(lambda username: Profiler.run_as(manager, self.try_make_user, username), usernames))
+        else:
+            users = [ self.try_make_user(username) for username in usernames ]
 
-    def populate_user_data(self) -> None:
         self.user_data = {}
-        for username in self.__class__.query_users(self.__class__.user_class.level):
-            self.user_data[username] = self.__class__.user_class(username)
-
-    def make_user_table(self, column_headers:list[str], users:ValuesView[User]) -> None:
-        self.report_table  = '{| class="wikitable sortable MisterSynergy-activity"\n'
-        self.report_table += '|-\n'
-        self.report_table += f'! {" !! ".join(column_headers)}\n'
-        for user in users:
-            self.report_table += user.report_table_row()
-            self.report_table += '\n'
-        self.report_table += '|}'
+        self.failed_usernames:list[str] = []
+        for username, user in zip(usernames, users):  # in the order of the member query
+            if user is not None:
+                self.user_data[username] = user
+            else:
+                self.failed_usernames.append(username)
+
+    def try_make_user(self, username:str) -> Optional[User]:  # a member with unexpected data gets a placeholder row instead of failing the report
+        try:
+            return self.make_user(username)
+        except (RuntimeError, *Replica.connection_errors()):  # the replicas or the API are unavailable, which affects every member
+            raise
+        except Exception as exception:
+            print(f'{self.__class__.__name__}: cannot evaluate user {username}: {exception}')
+            return None
+
+    def prefetch_user_data(self, usernames:list[str]) -> None:
+        self.__class__.user_class.prefetch_user_data(usernames)
+
+    def make_user(self, username:str) -> User:
+        return self.__class__.user_class(username)
+
+    def write_user_table(self, sink:TextIO) -> None:
+        sink.write('{| class="wikitable sortable MisterSynergy-activity"\n')
+        sink.write('|-\n')
+        sink.write(f'! {" !! ".join(self.__class__.report_column_headers)}\n')
+        for user in self.user_data.values():
+            sink.write(user.report_table_row())
+            sink.write('\n')
+        for username in self.failed_usernames:
+            sink.write(self.failed_user_row(username))
+            sink.write('\n')
+        sink.write('|}')
+
+    def failed_user_row(self, username:str) -> str:
+        report_table_wikitext_rows = [ '|-' ]
+
+        report_table_wikitext_rows.append(f'| {{{{User|{username}}}}}')
+        report_table_wikitext_rows.append(f'| colspan="{len(self.__class__.report_column_headers)-1}" | could not be evaluated')
+
+        return '\n'.join(report_table_wikitext_rows)
+
+    def release_user_data(self) -> None:  # once the report has been rendered
+        self.user_data = {}
 
     def print_user_table(self) -> None:
-        print(self.report_table)
+        self.write_user_table(sys.stdout)
+        print()
+
+    def write_report_page(self, sink:TextIO, t_start:float) -> None:
+        ReportTemplate.get(self.__class__.report_template).render(
+            sink,
+            {
+                'timestamp' : str(int(t_start)),
+                'timestamp_formatted' : strftime('%Y-%m-%d, %H:%M:%S (UTC)', gmtime(t_start)),
+                'report_table' : self.write_user_table,
+                'group' : self.__class__.user_class.level
+            }
+        )
 
     def get_report_page(self, t_start:float) -> str:
-        timestamp = str(int(t_start))
-        timestamp_formatted = strftime('%Y-%m-%d, %H:%M:%S (UTC)', gmtime(t_start))
-        
-        with open(f'./templates/{self.__class__.report_template}', mode='r', encoding='utf8') as file_handle:
-            template = file_handle.read()
-
-        body = template.format(
-            timestamp=timestamp,
-            timestamp_formatted=timestamp_formatted,
-            report_table=self.report_table,
-            group=self.__class__.user_class.level
-        )
+        sink = StringIO()
+        self.write_report_page(sink, t_start)
 
-        return body
+        return sink.getvalue()
 
 class UserManagerWithTimestamps(UserManager):
     user_class:Type[UserWithInactivityPolicy]
+    reference_time:Optional[struct_time] = None  # shared by all managers so that their thresholds (and cache keys) agree
+    _reference_time_lock = Lock()
     
     def __init__(self, timeframe:int) -> None:
         self.start_ts, self.warn_ts = UserManagerWithTimestamps.get_timestamps(timeframe)
         super().__init__()
 
-    def populate_user_data(self) -> None:
-        self.user_data = {}
-        for username in self.__class__.query_users(self.__class__.user_class.level):
-            self.user_data[username] = self.__class__.user_class(username, self.start_ts, self.warn_ts)
+    def make_user(self, username:str) -> User:
+        return self.__class__.user_class(username, self.start_ts, self.warn_ts)
 
     @staticmethod
     def get_timestamps(timeframe:int) -> tuple[int, int]:
-        start_month = int(strftime('%m')) - timeframe
-        start_year = int(strftime('%Y'))
+        with UserManagerWithTimestamps._reference_time_lock:
+            if UserManagerWithTimestamps.reference_time is None:
+                UserManagerWithTimestamps.reference_time = localtime()
+        now = UserManagerWithTimestamps.reference_time
+
+        start_month = int(strftime('%m', now)) - timeframe
+        start_year = int(strftime('%Y', now))
 
         if start_month<1:
             start_month += 12
@@ -479,7 +456,7 @@ class UserManagerWithTimestamps(UserManager):
             start_month_warn -= 12
             start_year_warn += 1
 
-        start_timestamp = int(f'{start_year:4d}{start_month:02d}{strftime("%d%H%M%S")}')
-        start_timestamp_warn = int(f'{start_year_warn:4d}{start_month_warn:02d}{strftime("%d%H%M%S")}')
+        start_timestamp = int(f'{start_year:4d}{start_month:02d}{strftime("%d%H%M%S", now)}')
+        start_timestamp_warn = int(f'{start_year_warn:4d}{start_month_warn:02d}{strftime("%d%H%M%S", now)}')
 
         return start_timestamp, start_timestamp_warn
@@ -0,0 +1,86 @@
+from bisect import bisect_left
+from threading import Lock
+
+from .GroupQuery import GroupQuery
+from .Replica import Replica
+
+
+class WikiScan:  # rare revisions read wiki-wide for the whole window once, then counted per actor in Python
+    # each query selects actor id and timestamp of all matching revisions since {since}; the namespace restriction
+    # lets the replica start from the page index. JS/CSS pages exist in every namespace, so they are queried per user
+    sources:dict[str, str] = {
+        'property_creations' : """SELECT
+          rev_actor,
+          rev_timestamp
+        FROM
+          page
+            JOIN revision ON page_id=rev_page
+        WHERE
+          rev_parent_id=0
+          AND rev_timestamp>={since}
+          AND page_namespace=120""",
+        'mediawiki_namespace_edits' : """SELECT
+          rev_actor,
+          rev_timestamp
+        FROM
+          revision
+            JOIN page ON rev_page=page_id
+        WHERE
+          rev_timestamp>={since}
+          AND page_namespace=8
+          AND page_content_model NOT IN ('css', 'sanitized-css', 'javascript', 'json')"""
+    }
+
+    _scans:dict[str, tuple[int, dict[int, list[int]]]] = {}  # source -> (since, actor id -> sorted timestamps)
+    _locks:dict[str, Lock] = { source : Lock() for source in sources }  # a long scan does not hold up the other sources
+
+    @classmethod
+    def get_timestamps(cls, source:str, since:int) -> dict[int, list[int]]:
+        with cls._locks[source]:  # managers needing the same scan wait for it instead of repeating it
+            scan = cls._scans.get(source)
+            if scan is None or since < scan[0]:  # a wider window than scanned so far
+                timestamps_by_actor:dict[int, list[int]] = {}
+                for actor_id, timestamp in Replica.stream(cls.sources[source].format(since=since), dictionary=False):
+                    timestamps_by_actor.setdefault(actor_id, []).append(int(timestamp))
+
+                for timestamps in timestamps_by_actor.values():
+                    timestamps.sort()
+
+                scan = (since, timestamps_by_actor)
+                cls._scans[source] = scan
+
+            return scan[1]
+
+    @classmethod
+    def clear(cls) -> None:
+        for source, lock in cls._locks.items():
+            with lock:
+                cls._scans.pop(source, None)
+
+    @classmethod
+    def count_windows(cls, source:str, usernames:list[str], thresholds:list[int]) -> dict[str, list[int]]:
+        timestamps_by_actor = cls.get_timestamps(source, min(thresholds))
+        actor_ids = GroupQuery.resolve_actor_ids(usernames)
+
+        result = {}
+        for username in usernames:
+            timestamps = timestamps_by_actor.get(actor_ids.get(username, 0), [])
+            result[username] = [ len(timestamps) - bisect_left(timestamps, threshold) for threshold in thresholds ]
+
+        return result
+
+    @staticmethod
+    def count_logged_actions_windows(usernames:list[str], thresholds:list[int], log_types:list[str]) -> dict[str, list[int]]:
+        return GroupQuery.count_logged_actions_windows(usernames, thresholds, log_types)  # logged actions are not rare
+
+    @staticmethod
+    def count_property_creations_windows(usernames:list[str], thresholds:list[int]) -> dict[str, list[int]]:
+        return WikiScan.count_windows('property_creations', usernames, thresholds)
+
+    @staticmethod
+    def count_mediawiki_namespace_edits_windows(usernames:list[str], thresholds:list[int]) -> dict[str, list[int]]:
+        return WikiScan.count_windows('mediawiki_namespace_edits', usernames, thresholds)
+
+    @staticmethod
+    def count_jscss_edits_windows(usernames:list[str], thresholds:list[int]) -> dict[str, list[int]]:
+        return GroupQuery.count_jscss_edits_windows(usernames, thresholds)
@@ -1,3 +1,14 @@
+from .ApiClient import ApiClient
+from .EventTable import EventTable
+from .FactCache import FactCache
+from .GroupMembership import GroupMembership
+from .Profiler import Profiler
+from .Publisher import Publisher
+from .Replica import Replica
+from .ReportTemplate import ReportTemplate
+from .StateStore import StateStore
+from .WikiScan import WikiScan
+
 from .AdminManager import AdminManager
 from .BureaucratManager import BureaucratManager
 from .OversighterManager import OversighterManager
@@ -12,4 +23,6 @@ from .FlooderManager import FlooderManager
 
 from .IPBlockExemptUserManager import IPBlockExemptUserManager
 from .RollbackerManager import RollbackerManager
-from .ConfirmedUserManager import ConfirmedUserManager
\ No newline at end of file
+from .ConfirmedUserManager import ConfirmedUserManager
+
+from .ManagerScheduler import ManagerScheduler
\ No newline at end of file